@@ -2,10 +2,12 @@ import os
 import asyncio
 import discord
 from discord.ext import commands
-from kedro.framework.session import KedroSession
-from kedro.framework.startup import bootstrap_project
-from kedro.framework.project import configure_project
-from pathlib import Path
+
+from kedro_2077.server import remote_query
+from kedro_2077.serving import build_index, run_query as run_query_pipeline
+
+# When set, /query is answered by a running query server (`python -m kedro_2077.server`)
+QUERY_SERVER_URL = os.getenv("QUERY_SERVER_URL")
 
 
 # --- Discord setup ---
@@ -37,7 +39,7 @@ async def show_help(ctx):
 
     embed.add_field(
         name="🧩 `/build`",
-        value="Rebuild the transcript partitions and wiki embeddings. This may take a while — I'll let you know when it's done.",
+        value="Rebuild the transcript partitions and wiki embeddings. This may take a while — queries keep being answered from the current data and I'll let you know when it's done.",
         inline=False
     )
 
@@ -60,24 +62,38 @@ async def hello(ctx):
 
 
 # --- Build embeddings and partition transcript ---
+# Only one build runs at a time, concurrent /build calls wait for the running one
+_build_task = None
+
+
+async def _build_index(ctx):
+    """Build a new index version in a staging directory and activate it once complete."""
+    loop = asyncio.get_running_loop()
+
+    def report(done, total, node_name):
+        asyncio.run_coroutine_threadsafe(
+            ctx.send(f"🔧 [{done}/{total}] `{node_name}` finished"), loop
+        )
+
+    # Run the blocking Kedro code in a separate thread
+    return await asyncio.to_thread(build_index, report)
+
+
 @bot.command(name="/build")
 async def build_embeddings(ctx):
     """Run the data processing pipeline asynchronously."""
+    global _build_task
 
-    await ctx.send("⏳ Building embeddings from wiki and transcript data, please wait...")
-
-    project_path = Path(__file__).resolve().parent
-    metadata = bootstrap_project(project_path)
-    configure_project(metadata.package_name)
+    if _build_task is not None and not _build_task.done():
+        await ctx.send("⏳ A build is already running, I'll let you know when it's done.")
+    else:
+        await ctx.send("⏳ Building embeddings from wiki and transcript data, please wait...")
+        _build_task = asyncio.create_task(_build_index(ctx))
 
     try:
-        # Run the blocking Kedro code in a separate thread
-        def run_kedro():
-            with KedroSession.create(project_path=project_path) as session:
-                return session.run(pipeline_name="process_transcript")
-
-        await asyncio.to_thread(run_kedro)
-        await ctx.send("✅ Embeddings and transcript partitions built successfully!")
+        # Shielded so a cancelled command doesn't cancel a build other users are waiting on
+        version = await asyncio.shield(_build_task)
+        await ctx.send(f"✅ Embeddings and transcript partitions built successfully! Now serving index `{version}`.")
 
     except Exception as e:
         await ctx.send(f"❌ Error running pipeline: {e}")
@@ -90,26 +106,15 @@ async def run_query(ctx, *, user_query: str):
 
     await ctx.send(f"🚀 Running Kedro pipeline for query: `{user_query}`...\n\n")
 
-    project_path = Path(__file__).resolve().parent
-    metadata = bootstrap_project(project_path)
-    configure_project(metadata.package_name)
-
     try:
-        # Run the blocking Kedro code in a separate thread
-        def run_kedro():
-            with KedroSession.create(
-                project_path=project_path,
-                runtime_params={"user_query": user_query}
-            ) as session:
-                return session.run(pipeline_name="query_pipeline", tags=["discord"])
-
-        result = await asyncio.to_thread(run_kedro)
-
-        # Extract LLM node output
-        llm_memory_dataset = result.get("llm_response_discord")
-        llm_response = result.get("query_llm_discord")
-        if llm_memory_dataset:
-            llm_response = llm_memory_dataset.load()
+        if QUERY_SERVER_URL:
+            response = await asyncio.to_thread(remote_query, QUERY_SERVER_URL, user_query)
+            llm_response = response.get("answer")
+        else:
+            # Run the blocking Kedro code in a separate thread
+            llm_response = await asyncio.to_thread(run_query_pipeline, user_query)
+
+        if llm_response:
             if len(llm_response) > 1900:
                 max_len = 2000
                 for i in range(0, len(llm_response), max_len):
@@ -0,0 +1,275 @@
+"""Disk-backed semantic cache for LLM answers.
+
+An answer is reused when a new question's embedding is close enough to a
+cached one (cosine similarity above a threshold) and the retrieved contexts
+are the same, so paraphrases of a question skip the LLM call. Entries belong
+to the index version they were answered from and are dropped once another
+version becomes active. Entries expire after a TTL, and the least recently
+used ones are evicted once the cache is full.
+
+Lookups only read. Hit counters and the last use of entries are kept in memory
+and written in one transaction every ``flush_interval`` seconds, expired entries
+are skipped by lookups and deleted on writes, and entries of old index versions
+are deleted once, when the active version changes. The database runs in WAL
+mode, so readers in other processes don't wait for writers.
+
+A SQLite connection can't be used across ``fork()``, so every process opens its
+own on first use, e.g. server workers forked after the cache was created.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Expired entries are deleted at most this often
+EXPIRE_INTERVAL_SECONDS = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    index_version TEXT NOT NULL,
+    context_fingerprint TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_key ON entries (index_version, context_fingerprint);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used_at);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def context_fingerprint(contexts: List[Dict[str, Any]]) -> str:
+    """Fingerprint of the retrieved contexts, in rank order."""
+    digest = hashlib.sha1()
+    for ctx in contexts:
+        digest.update(ctx["source"].encode("utf-8"))
+        digest.update(b"\x1f")
+        digest.update(ctx["text"].encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    SQLite-backed semantic answer cache, safe to share between threads and forked processes.
+
+    Args:
+        path: SQLite file, created if missing.
+        similarity_threshold: Minimum cosine similarity between query embeddings for a hit.
+        max_entries: Number of entries kept before least recently used ones are evicted.
+        ttl_seconds: Age after which entries expire, ``None`` to keep them until evicted.
+        flush_interval: Seconds between writes of the hit counters and entry use times.
+        busy_timeout: Seconds to wait for another connection's write lock.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/cache/answer_cache.sqlite",
+        similarity_threshold: float = 0.92,
+        max_entries: int = 5000,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        flush_interval: float = 5.0,
+        busy_timeout: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.busy_timeout = busy_timeout
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Connections inherited through fork(), kept open and unused
+        self._inherited: List[sqlite3.Connection] = []
+
+        self._active_version: Optional[str] = None
+        self._pending_stats: Counter = Counter()
+        # Entry id -> (hits, last use) not written yet
+        self._pending_uses: Dict[int, Tuple[int, float]] = {}
+        self._flushed_at = self._expired_at = time.time()
+
+    def lookup(self, query_embedding: Any, fingerprint: Optional[str], index_version: str) -> Optional[str]:
+        """
+        Return the cached answer for a similar query over the same contexts, if any.
+
+        With ``fingerprint=None`` an answer to a similar query is returned whatever
+        contexts it was answered from, as a fallback when there's no time to answer.
+        """
+        embedding = self._normalize(query_embedding)
+        now = time.time()
+        query = "SELECT id, embedding, answer FROM entries WHERE index_version = ? AND created_at >= ?"
+        args = (index_version, self._expiry_cutoff(now))
+        if fingerprint is not None:
+            query += " AND context_fingerprint = ?"
+            args += (fingerprint,)
+
+        with self._lock:
+            rows = self._connection().execute(query, args).fetchall()
+
+            best_id, best_answer, best_similarity = None, None, -1.0
+            if rows:
+                embeddings = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32)
+                similarities = embeddings.reshape(len(rows), -1) @ embedding
+                best = int(np.argmax(similarities))
+                best_id, best_answer, best_similarity = rows[best][0], rows[best][2], float(similarities[best])
+
+            hit = best_id is not None and best_similarity >= self.similarity_threshold
+            if hit:
+                hits, _ = self._pending_uses.get(best_id, (0, now))
+                self._pending_uses[best_id] = (hits + 1, now)
+            self._pending_stats["hits" if hit else "misses"] += 1
+            counters = self._counters()
+            if now - self._flushed_at >= self.flush_interval:
+                self._flush(now)
+
+        lookups = counters["hits"] + counters["misses"]
+        logger.info(
+            "Answer cache %s (best similarity %.3f), hit rate %.1f%% over %d lookups",
+            "hit" if hit else "miss", best_similarity, 100 * counters["hits"] / lookups, lookups,
+        )
+        return best_answer if hit else None
+
+    def store(self, query: str, query_embedding: Any, fingerprint: str, index_version: str, answer: str) -> None:
+        embedding = self._normalize(query_embedding)
+        now = time.time()
+
+        with self._lock:
+            # Eviction needs the last use of entries to be up to date
+            self._flush(now)
+            conn = self._connection()
+            with conn:
+                if now - self._expired_at >= EXPIRE_INTERVAL_SECONDS:
+                    self._expire(now)
+                conn.execute(
+                    "INSERT INTO entries (index_version, context_fingerprint, query, embedding, answer, created_at, last_used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (index_version, fingerprint, query, embedding.tobytes(), answer, now, now),
+                )
+                self._evict()
+
+    def flush(self) -> None:
+        """Write the pending hit counters and entry use times."""
+        with self._lock:
+            self._flush(time.time())
+
+    def invalidate(self, active_version: Optional[str]) -> int:
+        """
+        Drop every entry that wasn't answered from ``active_version``.
+
+        Only touches the database when the active version differs from the one
+        this cache was last invalidated for, so it's cheap to call on every query.
+        """
+        with self._lock:
+            if active_version == self._active_version:
+                return 0
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM entries WHERE index_version != ?", (active_version or "",)
+                )
+            self._active_version = active_version
+        if cursor.rowcount:
+            logger.info("Answer cache dropped %d entries from old index versions", cursor.rowcount)
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters over every process using the cache, plus this one's unwritten ones."""
+        with self._lock:
+            counters = self._counters()
+            entries = self._connection().execute(
+                "SELECT COUNT(*) FROM entries WHERE created_at >= ?", (self._expiry_cutoff(time.time()),)
+            ).fetchone()[0]
+        hits, misses = counters["hits"], counters["misses"]
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "lookups": lookups,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current process, opened on first use. Called with the lock held.
+
+        A process forked from one that used the cache opens a connection of its own, and
+        drops the pending counters it inherited, which the parent writes itself. The inherited
+        connection is never closed: the child doesn't hold the parent's file locks, so closing
+        it could checkpoint and delete the WAL the parent is using.
+        """
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+                self._pending_stats.clear()
+                self._pending_uses.clear()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _normalize(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _counters(self) -> Counter:
+        counters = Counter(dict(self._connection().execute("SELECT name, value FROM stats").fetchall()))
+        counters.update(self._pending_stats)
+        return counters
+
+    def _flush(self, now: float) -> None:
+        conn = self._connection()
+        if self._pending_stats or self._pending_uses:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    self._pending_stats.items(),
+                )
+                conn.executemany(
+                    "UPDATE entries SET hits = hits + ?, last_used_at = ? WHERE id = ?",
+                    [(hits, used_at, entry_id) for entry_id, (hits, used_at) in self._pending_uses.items()],
+                )
+            self._pending_stats.clear()
+            self._pending_uses.clear()
+        self._flushed_at = now
+
+    def _expiry_cutoff(self, now: float) -> float:
+        return float("-inf") if self.ttl_seconds is None else now - self.ttl_seconds
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._connection().execute("DELETE FROM entries WHERE created_at < ?", (self._expiry_cutoff(now),))
+        self._expired_at = now
+
+    def _evict(self) -> None:
+        conn = self._connection()
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY last_used_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
@@ -0,0 +1,116 @@
+"""Dynamic micro-batching of query encoding.
+
+Concurrent queries each need a single embedding, and encoding one string at a
+time pays the model's per-call overhead for every query. ``BatchingEncoder``
+queues the strings submitted from any thread, waits a few milliseconds for
+more to arrive (or until the batch is full), encodes the whole batch in one
+forward pass, and hands every caller its own vector back.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingEncoder:
+    """
+    Thread-safe wrapper batching ``model.encode`` calls across callers.
+
+    Args:
+        model: Anything with a SentenceTransformer-style ``encode(list_of_texts, **kwargs)``.
+        window_ms: How long to wait for more texts after the first one of a batch arrives.
+        max_batch_size: Batch size at which encoding starts without waiting for the window to end.
+        normalize_embeddings: Whether vectors are L2-normalized.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        normalize_embeddings: bool = True,
+    ):
+        self.model = model
+        self.window = window_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.normalize_embeddings = normalize_embeddings
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"texts": 0, "batches": 0, "max_batch": 0}
+
+    def encode(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """Encode one string, batched with whatever other strings are submitted meanwhile."""
+        return self.submit(text).result(timeout)
+
+    def submit(self, text: str) -> Future:
+        """Queue one string and return a future resolving to its vector."""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_batch"] = stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="batching-encoder", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        """Block for the first text, then gather more until the window ends or the batch is full."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # Callers that gave up don't need encoding
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.model.encode(
+                    texts,
+                    batch_size=len(texts),
+                    convert_to_numpy=True,
+                    normalize_embeddings=self.normalize_embeddings,
+                )
+            except Exception as e:
+                logger.warning("Encoding a batch of %d queries failed: %s", len(texts), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+            with self._lock:
+                self._stats["texts"] += len(texts)
+                self._stats["batches"] += 1
+                self._stats["max_batch"] = max(self._stats["max_batch"], len(texts))
+            logger.debug("Encoded a batch of %d queries", len(texts))
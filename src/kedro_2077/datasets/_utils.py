@@ -0,0 +1,12 @@
+"""Helpers shared by the index datasets."""
+import mmap
+from pathlib import Path
+from typing import Any
+
+
+def map_file(path: Path) -> Any:
+    """Memory-map a file read-only. Empty files can't be mapped and load as empty bytes."""
+    with path.open("rb") as f:
+        if not path.stat().st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,110 @@
+import json
+from array import array
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from kedro.io import AbstractDataset, DatasetError
+
+from kedro_2077.datasets._utils import map_file
+from kedro_2077.transcript_index import TranscriptIndex
+
+
+class TranscriptIndexDataset(AbstractDataset[TranscriptIndex, TranscriptIndex]):
+    """
+    A Kedro dataset storing a `TranscriptIndex` as a directory of files.
+
+    - `transcript.txt`: the cleaned transcript, stored once, UTF-8 encoded
+    - `sentence_offsets.bin`: native-endian uint32 byte offsets of every sentence start,
+      followed by the length of the text
+    - `chunks.json`: the `[start_sentence, end_sentence]` range of every chunk
+    - `line_offsets.bin`: optional, uint32 byte offsets of every line start, same layout
+      as the sentence offsets
+    - `chunk_embeddings.f32`: optional, raw float32 matrix of L2-normalized chunk embeddings,
+      one row per chunk. Indexes built without it load with no embeddings.
+
+    Chunk text is not stored, it is sliced out of `transcript.txt` when needed. With
+    `mmap: true` the text and the embedding matrix are memory-mapped read-only instead of
+    read into memory, so processes loading the same index share one copy of them through
+    the page cache.
+
+    ### Example usage for the [YAML API](https://docs.kedro.org/en/stable/catalog-data/data_catalog_yaml_examples/):
+    ```yaml
+    transcript_chunks:
+        type: kedro_2077.datasets.transcript_index_dataset.TranscriptIndexDataset
+        path: data/processed/transcript
+    ```
+    """
+
+    TEXT_FILE = "transcript.txt"
+    OFFSETS_FILE = "sentence_offsets.bin"
+    CHUNKS_FILE = "chunks.json"
+    LINES_FILE = "line_offsets.bin"
+    EMBEDDINGS_FILE = "chunk_embeddings.f32"
+
+    def __init__(self, path: str, mmap: bool = False, metadata: dict[str, Any] | None = None):
+        """
+        Initialize the transcript index dataset.
+
+        Args:
+            path: Local directory holding the index files
+            mmap: Memory-map the transcript text and chunk embeddings instead of reading them
+            metadata: Arbitrary metadata
+        """
+        super().__init__()
+        self._path = Path(path)
+        self._mmap = mmap
+        self.metadata = metadata
+
+    def load(self) -> TranscriptIndex:
+        try:
+            text = map_file(self._path / self.TEXT_FILE) if self._mmap else (self._path / self.TEXT_FILE).read_bytes()
+            offsets = array("I")
+            offsets.frombytes((self._path / self.OFFSETS_FILE).read_bytes())
+            chunks = json.loads((self._path / self.CHUNKS_FILE).read_text(encoding="utf-8"))
+
+            line_offsets = None
+            if (self._path / self.LINES_FILE).exists():
+                line_offsets = array("I")
+                line_offsets.frombytes((self._path / self.LINES_FILE).read_bytes())
+
+            embeddings = None
+            if (self._path / self.EMBEDDINGS_FILE).exists():
+                embeddings = self._load_embeddings(len(chunks))
+        except OSError as e:
+            raise DatasetError(f"Failed to load transcript index from {self._path}: {e}")
+
+        return TranscriptIndex(text, offsets, chunks, line_offsets, embeddings)
+
+    def _load_embeddings(self, count: int) -> np.ndarray:
+        path = self._path / self.EMBEDDINGS_FILE
+        size = path.stat().st_size
+        if not count or not size:
+            return np.empty((0, 0), dtype=np.float32)
+        if size % (4 * count):
+            raise DatasetError(f"{path} doesn't hold one embedding row per chunk")
+        if self._mmap:
+            embeddings = np.memmap(path, dtype=np.float32, mode="r")
+        else:
+            embeddings = np.fromfile(path, dtype=np.float32)
+        return embeddings.reshape(count, -1)
+
+    def save(self, data: TranscriptIndex) -> None:
+        if data.embeddings is not None and len(data.embeddings) != len(data.chunks):
+            raise DatasetError("A transcript index needs one embedding row per chunk")
+        self._path.mkdir(parents=True, exist_ok=True)
+        (self._path / self.TEXT_FILE).write_bytes(bytes(data.text))
+        (self._path / self.OFFSETS_FILE).write_bytes(array("I", data.sentence_offsets).tobytes())
+        (self._path / self.CHUNKS_FILE).write_text(json.dumps(data.chunks), encoding="utf-8")
+        if data.line_offsets is not None:
+            (self._path / self.LINES_FILE).write_bytes(array("I", data.line_offsets).tobytes())
+        if data.embeddings is not None:
+            np.ascontiguousarray(data.embeddings, dtype=np.float32).tofile(self._path / self.EMBEDDINGS_FILE)
+        else:
+            (self._path / self.EMBEDDINGS_FILE).unlink(missing_ok=True)
+
+    def _describe(self) -> dict[str, Any]:
+        return {"path": str(self._path), "mmap": self._mmap}
+
+    def _exists(self) -> bool:
+        return all((self._path / name).exists() for name in (self.TEXT_FILE, self.OFFSETS_FILE, self.CHUNKS_FILE))
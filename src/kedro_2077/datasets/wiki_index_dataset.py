@@ -0,0 +1,131 @@
+import json
+from array import array
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from kedro.io import AbstractDataset, DatasetError
+
+from kedro_2077.datasets._utils import map_file
+from kedro_2077.wiki_index import WikiIndex
+
+
+class WikiIndexDataset(AbstractDataset[dict, WikiIndex]):
+    """
+    A Kedro dataset writing wiki embeddings incrementally and loading them as a `WikiIndex`.
+
+    Each `save()` appends one batch, so a generator node can write embeddings out as it
+    computes them and never hold the whole wiki in memory. The first save made through
+    a dataset instance starts the index from scratch. A batch is a dict with:
+
+    - `titles`: list of page titles
+    - `texts`: list of page texts
+    - `embeddings`: `(len(titles), dim)` float32 array
+
+    Files in the directory:
+
+    - `titles.jsonl`: one JSON-encoded title per line
+    - `text.bin` and `text_offsets.bin`: concatenated UTF-8 page texts and the
+      native-endian uint64 end offset of every page
+    - `embeddings.f32`: raw float32 matrix, one row per page
+    - `meta.json`: number of pages and embedding dimension
+
+    With `mmap: true` the page text and the embedding matrix are memory-mapped
+    read-only instead of read into memory, so processes loading the same index share
+    one copy of them through the page cache.
+
+    ### Example usage for the [YAML API](https://docs.kedro.org/en/stable/catalog-data/data_catalog_yaml_examples/):
+    ```yaml
+    wiki_embeddings:
+        type: kedro_2077.datasets.wiki_index_dataset.WikiIndexDataset
+        path: data/processed/wiki
+    ```
+    """
+
+    TITLES_FILE = "titles.jsonl"
+    TEXT_FILE = "text.bin"
+    OFFSETS_FILE = "text_offsets.bin"
+    EMBEDDINGS_FILE = "embeddings.f32"
+    META_FILE = "meta.json"
+
+    def __init__(self, path: str, mmap: bool = False, metadata: dict[str, Any] | None = None):
+        """
+        Initialize the wiki index dataset.
+
+        Args:
+            path: Local directory holding the index files
+            mmap: Memory-map the page text and embeddings instead of reading them
+            metadata: Arbitrary metadata
+        """
+        super().__init__()
+        self._path = Path(path)
+        self._mmap = mmap
+        self.metadata = metadata
+        self._started = False
+
+    def load(self) -> WikiIndex:
+        try:
+            meta = json.loads((self._path / self.META_FILE).read_text(encoding="utf-8"))
+            with (self._path / self.TITLES_FILE).open(encoding="utf-8") as f:
+                titles = [json.loads(line) for line in f]
+            ends = array("Q")
+            ends.frombytes((self._path / self.OFFSETS_FILE).read_bytes())
+            if self._mmap:
+                text = map_file(self._path / self.TEXT_FILE)
+                embeddings = (
+                    np.memmap(self._path / self.EMBEDDINGS_FILE, dtype=np.float32, mode="r")
+                    if meta["count"] else np.empty(0, dtype=np.float32)
+                )
+            else:
+                text = (self._path / self.TEXT_FILE).read_bytes()
+                embeddings = np.fromfile(self._path / self.EMBEDDINGS_FILE, dtype=np.float32)
+        except OSError as e:
+            raise DatasetError(f"Failed to load wiki index from {self._path}: {e}")
+
+        offsets = array("Q", [0])
+        offsets.extend(ends[:meta["count"]])
+        embeddings = embeddings[:meta["count"] * meta["dim"]].reshape(meta["count"], meta["dim"])
+        return WikiIndex(titles, text, offsets, embeddings)
+
+    def save(self, data: dict) -> None:
+        titles, texts = list(data["titles"]), list(data["texts"])
+        embeddings = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) != len(titles) or len(texts) != len(titles):
+            raise DatasetError("A wiki index batch needs one text and one embedding row per title")
+
+        if not self._started:
+            self._path.mkdir(parents=True, exist_ok=True)
+            for name in (self.TITLES_FILE, self.TEXT_FILE, self.OFFSETS_FILE, self.EMBEDDINGS_FILE):
+                (self._path / name).write_bytes(b"")
+            meta = {"count": 0, "dim": embeddings.shape[1]}
+            self._started = True
+        else:
+            meta = json.loads((self._path / self.META_FILE).read_text(encoding="utf-8"))
+            if embeddings.shape[1] != meta["dim"]:
+                raise DatasetError(f"Embedding dimension {embeddings.shape[1]} doesn't match {meta['dim']}")
+
+        with (self._path / self.TEXT_FILE).open("ab") as f:
+            end = f.tell()
+            ends = array("Q")
+            for text in texts:
+                encoded = text.encode("utf-8")
+                f.write(encoded)
+                end += len(encoded)
+                ends.append(end)
+
+        with (self._path / self.OFFSETS_FILE).open("ab") as f:
+            f.write(ends.tobytes())
+        with (self._path / self.EMBEDDINGS_FILE).open("ab") as f:
+            f.write(embeddings.tobytes())
+        with (self._path / self.TITLES_FILE).open("a", encoding="utf-8") as f:
+            f.writelines(json.dumps(title) + "\n" for title in titles)
+
+        # Written last, so the page count only covers fully appended batches
+        meta["count"] += len(titles)
+        (self._path / self.META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    def _describe(self) -> dict[str, Any]:
+        return {"path": str(self._path), "mmap": self._mmap}
+
+    def _exists(self) -> bool:
+        return (self._path / self.META_FILE).exists()
@@ -0,0 +1,173 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator, TextIO, Tuple
+
+from kedro.io import AbstractDataset, DatasetError
+
+WikiPage = Tuple[str, str]
+
+
+class WikiPagesDataset(AbstractDataset[None, Iterator[WikiPage]]):
+    """
+    A Kedro dataset streaming `(title, text)` pairs from a wiki dump without loading it whole.
+
+    Two file formats are supported:
+
+    - `json`: a single object mapping page titles to their text, like `wiki_clean_text.json`.
+      It is parsed incrementally, one page at a time, from a fixed-size read buffer.
+    - `jsonl`: one page per line, either `{"title": ..., "text": ...}` or `{"<title>": "<text>"}`.
+
+    Every `load()` returns a fresh iterator, so several nodes can consume the same dump.
+
+    ### Example usage for the [YAML API](https://docs.kedro.org/en/stable/catalog-data/data_catalog_yaml_examples/):
+    ```yaml
+    cyberpunk_wiki:
+        type: kedro_2077.datasets.wiki_pages_dataset.WikiPagesDataset
+        filepath: data/raw/wiki_clean_text.json
+    ```
+    """
+
+    FORMATS = {"json", "jsonl"}
+
+    def __init__(
+        self,
+        filepath: str,
+        file_format: str | None = None,
+        encoding: str = "utf-8",
+        read_size: int = 1 << 16,
+        metadata: dict[str, Any] | None = None,
+    ):
+        """
+        Initialize the wiki pages dataset.
+
+        Args:
+            filepath: Local path to the wiki dump
+            file_format: "json" or "jsonl", inferred from the file extension if not given
+            encoding: Text encoding of the file
+            read_size: Number of characters read at a time when parsing a JSON object
+            metadata: Arbitrary metadata
+        """
+        super().__init__()
+        self._filepath = Path(filepath)
+        self._file_format = file_format or ("jsonl" if self._filepath.suffix == ".jsonl" else "json")
+        if self._file_format not in self.FORMATS:
+            raise DatasetError(
+                f"Invalid file format '{self._file_format}'. Must be one of: {sorted(self.FORMATS)}"
+            )
+        self._encoding = encoding
+        self._read_size = read_size
+        self.metadata = metadata
+
+    def load(self) -> Iterator[WikiPage]:
+        if not self._filepath.exists():
+            raise DatasetError(f"Wiki dump not found: {self._filepath}")
+        iterate = self._iter_jsonl if self._file_format == "jsonl" else self._iter_json_object
+        return iterate()
+
+    def save(self, data: Any) -> None:
+        raise DatasetError("Saving is not supported for WikiPagesDataset")
+
+    def _describe(self) -> dict[str, Any]:
+        return {"filepath": str(self._filepath), "file_format": self._file_format}
+
+    def _exists(self) -> bool:
+        return self._filepath.exists()
+
+    def _iter_jsonl(self) -> Iterator[WikiPage]:
+        with self._filepath.open(encoding=self._encoding) as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise DatasetError(f"Invalid JSON on line {line_no} of {self._filepath}: {e}")
+
+                if "title" in record and "text" in record:
+                    yield record["title"], record["text"]
+                else:
+                    yield from record.items()
+
+    def _iter_json_object(self) -> Iterator[WikiPage]:
+        with self._filepath.open(encoding=self._encoding) as f:
+            yield from _JSONObjectStream(f, self._read_size, str(self._filepath))
+
+
+class _JSONObjectStream:
+    """Incremental parser yielding the `(key, value)` pairs of a top-level JSON object."""
+
+    _WHITESPACE = " \t\n\r"
+
+    def __init__(self, f: TextIO, read_size: int, name: str):
+        self._f = f
+        self._read_size = read_size
+        self._name = name
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[WikiPage]:
+        self._expect("{")
+        if self._peek() == "}":
+            return
+
+        while True:
+            key = self._decode()
+            self._expect(":")
+            value = self._decode()
+            yield key, value
+
+            separator = self._peek()
+            self._pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                self._fail(f"expected ',' or '}}', got {separator!r}")
+
+    def _fill(self) -> bool:
+        """Read more input, dropping what was already consumed. Returns False at EOF."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._read_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                self._fail("unexpected end of file")
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            self._fail(f"expected {char!r}, got {found!r}")
+        self._pos += 1
+
+    def _decode(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value ending exactly at the buffer end (e.g. a number) may continue in the next read
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _fail(self, message: str) -> None:
+        raise DatasetError(f"Invalid JSON in {self._name} at offset {self._pos}: {message}")
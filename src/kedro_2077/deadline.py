@@ -0,0 +1,111 @@
+"""End-to-end latency budget for a single query.
+
+A ``Deadline`` is started when a query arrives and handed to every stage of
+the query pipeline. Each stage checks how much of the budget is left and, when
+it runs short, steps down a degradation ladder instead of making the user wait:
+
+0. ``full``: nothing was cut.
+1. ``fewer_contexts``: retrieval stopped early or returned fewer contexts.
+2. ``smaller_prompt``: contexts were truncated harder to shrink the prompt.
+3. ``cached_answer``: the LLM was skipped or timed out, and a cached answer to
+   a similar question was used.
+4. ``retrieval_only``: no answer could be produced in time, the reply is made of
+   the top retrieved passages.
+
+The deadline remembers the deepest level reached and every step down, and
+``log_degradation`` appends them to a JSONL log.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("full", "fewer_contexts", "smaller_prompt", "cached_answer", "retrieval_only")
+FULL, FEWER_CONTEXTS, SMALLER_PROMPT, CACHED_ANSWER, RETRIEVAL_ONLY = range(len(LEVELS))
+
+DEGRADATION_LOG = Path("data/logs/degradation.jsonl")
+
+_log_lock = threading.Lock()
+
+
+class Deadline:
+    """
+    Latency budget of one query, and the degradation it went through.
+
+    Args:
+        seconds: End-to-end budget, ``None`` for no limit.
+        started_at: ``time.monotonic()`` value at which the query arrived, defaults to now.
+        fewer_contexts_below: Retrieval is cut back when less than this many seconds are left.
+        smaller_prompt_below: The prompt is shrunk when less than this many seconds are left.
+        min_llm_seconds: The LLM is only called with at least this many seconds left.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        started_at: Optional[float] = None,
+        fewer_contexts_below: float = 20.0,
+        smaller_prompt_below: float = 12.0,
+        min_llm_seconds: float = 4.0,
+    ):
+        self.seconds = seconds
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.expires_at = None if seconds is None else self.started_at + seconds
+        self.fewer_contexts_below = fewer_contexts_below
+        self.smaller_prompt_below = smaller_prompt_below
+        self.min_llm_seconds = min_llm_seconds
+
+        self.level = FULL
+        self.steps: List[Dict[str, Any]] = []
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, ``inf`` without a budget."""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self) -> Optional[float]:
+        """Seconds left as a timeout for calls taking an optional one, ``None`` without a budget."""
+        return None if self.expires_at is None else self.remaining()
+
+    def below(self, seconds: float) -> bool:
+        """Whether less than ``seconds`` of the budget are left."""
+        return self.remaining() < seconds
+
+    def degrade(self, level: int, reason: str) -> None:
+        """Record a step down the degradation ladder."""
+        self.level = max(self.level, level)
+        self.steps.append({"level": LEVELS[level], "reason": reason, "elapsed": round(self.elapsed(), 3)})
+        logger.info("Query degraded to %s after %.2fs: %s", LEVELS[level], self.elapsed(), reason)
+
+    @property
+    def level_name(self) -> str:
+        return LEVELS[self.level]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget": self.seconds,
+            "elapsed": round(self.elapsed(), 3),
+            "level": self.level,
+            "level_name": self.level_name,
+            "steps": self.steps,
+        }
+
+
+def log_degradation(user_query: str, deadline: Deadline, path: Path = DEGRADATION_LOG) -> None:
+    """Append the degradation level a query hit to a JSONL log."""
+    record = json.dumps({"timestamp": time.time(), "query": user_query, **deadline.summary()})
+    with _log_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(record + "\n")
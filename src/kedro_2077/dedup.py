@@ -0,0 +1,151 @@
+"""MinHash/LSH near-duplicate detection.
+
+Texts are turned into sets of word shingles, and every set is summarized by a
+MinHash signature: the minimum of ``num_perm`` independent hash functions over
+its shingles. The fraction of equal signature positions estimates the Jaccard
+similarity of two shingle sets. Signatures are split into bands and every band
+is hashed into a bucket, so only texts sharing at least one bucket are
+compared (locality-sensitive hashing). The number of bands is picked so that
+pairs around the similarity threshold are likely to collide.
+
+Entries are checked in order, and the first entry of a group of near-duplicates
+is kept as the canonical one.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Multiplier combining consecutive word hashes into a shingle hash
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+# Shingle hashes are processed in blocks to bound the size of the hash matrix
+_BLOCK_SIZE = 4096
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """
+    Hash every run of ``shingle_size`` consecutive words of ``text``.
+
+    Words are lowercased. Texts shorter than a shingle make up a single shingle.
+
+    Returns:
+        Unique uint64 shingle hashes, empty for a text without words.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words)
+    )
+    size = min(shingle_size, len(words))
+    count = len(words) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(size):
+        hashes = hashes * _SHINGLE_BASE + word_hashes[offset:offset + count]
+    return np.unique(hashes)
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick ``(bands, rows)`` with ``bands * rows <= num_perm`` whose collision curve
+    ``1 - (1 - s ** rows) ** bands`` crosses 1/2 closest to ``threshold``.
+    """
+    best, best_error = (1, num_perm), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 - 0.5 ** (1 / bands)) ** (1 / rows)
+        error = abs(midpoint - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHashDeduplicator:
+    """
+    Streaming near-duplicate detector.
+
+    Args:
+        threshold: Estimated Jaccard similarity of shingle sets above which two texts are duplicates.
+        num_perm: Number of hash functions in a signature. More is more accurate, and slower.
+        shingle_size: Number of consecutive words in a shingle.
+        seed: Seed of the hash functions, so results are reproducible.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        # Multiply-shift hash functions h(x) = (a * x + b) >> 32, with a odd
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._keys: List[Hashable] = []
+        self._signatures: List[np.ndarray] = []
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self.duplicates: Dict[Hashable, Hashable] = {}
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of ``text``, or ``None`` if it has no words."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not len(hashes):
+            return None
+
+        signature = np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK_SIZE):
+            block = hashes[start:start + _BLOCK_SIZE, None]
+            values = (block * self._a + self._b) >> np.uint64(32)
+            np.minimum(signature, values.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """
+        Check ``text`` against every entry kept so far.
+
+        Returns:
+            The key of the canonical entry ``text`` duplicates, or ``None`` if it was
+            kept as a new canonical entry. Texts without words are never duplicates.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        band_keys = [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)
+        ]
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+
+        best, best_similarity = None, -1.0
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+
+        if best is not None and best_similarity >= self.threshold:
+            canonical = self._keys[best]
+            self.duplicates[key] = canonical
+            return canonical
+
+        entry = len(self._keys)
+        self._keys.append(key)
+        self._signatures.append(signature)
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, []).append(entry)
+        return None
+
+    def add_all(self, entries: Iterable[Tuple[Hashable, str]]) -> Dict[Hashable, Hashable]:
+        """Add ``(key, text)`` pairs in order and return the duplicate -> canonical mapping."""
+        for key, text in entries:
+            self.add(key, text)
+        return self.duplicates
@@ -0,0 +1,118 @@
+"""Extractive fast path for simple entity lookups.
+
+Questions like "who is Judy?" or "what is the Relic?" are answered by the
+opening paragraph of a wiki page, and retrieval usually ranks that page first
+by a wide margin. ``EntityLookup`` recognizes those questions and, when the
+top context is the wiki page of the entity asked about and beats the runner-up
+by enough, answers straight from it without calling the LLM.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_PATTERN = re.compile(
+    r"^\s*(?:who|what)(?:'s|\s+(?:is|are|was|were))\s+(?:the\s+|an?\s+)?(?P<entity>[^?!.]+?)\s*[?!.]*\s*$",
+    re.IGNORECASE,
+)
+_PARENTHETICAL_PATTERN = re.compile(r"\s*\([^)]*\)")
+_NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def _normalize(name: str) -> str:
+    name = _PARENTHETICAL_PATTERN.sub("", name)
+    return " ".join(_NON_WORD_PATTERN.sub(" ", name.lower()).split())
+
+
+def asked_entity(query: str) -> Optional[str]:
+    """Return the entity a "who is X" / "what is Y" question asks about, or ``None``."""
+    match = _QUESTION_PATTERN.match(query)
+    return match.group("entity") if match else None
+
+
+class EntityLookup:
+    """
+    Classifier and extractive answerer for entity lookups, with a running hit rate.
+
+    Args:
+        min_margin: How much the top context's similarity must beat the runner-up's by.
+        min_similarity: Minimum similarity of the top context.
+        max_sentences: Number of sentences of the opening paragraph in the answer.
+    """
+
+    def __init__(self, min_margin: float = 0.1, min_similarity: float = 0.3, max_sentences: int = 3):
+        self.min_margin = min_margin
+        self.min_similarity = min_similarity
+        self.max_sentences = max_sentences
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+
+    def answer(self, query: str, contexts: List[Dict[str, Any]], character_list: Dict[str, int]) -> Optional[str]:
+        """Answer from the top wiki passage if ``query`` is a confident entity lookup, else ``None``."""
+        reason = self._classify(query, contexts, character_list)
+        hit = reason is None
+
+        with self._lock:
+            self._lookups += 1
+            self._hits += hit
+            lookups, hits = self._lookups, self._hits
+        logger.info(
+            "Entity lookup fast path %s%s, hit rate %.1f%% over %d queries",
+            "hit" if hit else "miss", "" if hit else f" ({reason})", 100 * hits / lookups, lookups,
+        )
+        return self._extract(contexts[0]) if hit else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups, hits = self._lookups, self._hits
+        return {"lookups": lookups, "hits": hits, "hit_rate": hits / lookups if lookups else 0.0}
+
+    def _classify(self, query: str, contexts: List[Dict[str, Any]], character_list: Dict[str, int]) -> Optional[str]:
+        """Return why ``query`` can't take the fast path, or ``None`` if it can."""
+        entity = asked_entity(query)
+        if entity is None:
+            return "not an entity lookup"
+        if not contexts or contexts[0]["source"] != "wiki" or not contexts[0].get("title"):
+            return "top context isn't a wiki page"
+
+        top = contexts[0]
+        if top["similarity"] < self.min_similarity:
+            return f"top similarity {top['similarity']:.2f}"
+        # Without a runner-up, e.g. when a short latency budget cut the contexts to one,
+        # there's nothing to measure the margin against
+        if len(contexts) < 2:
+            return "no runner-up context to compare with"
+        margin = top["similarity"] - contexts[1]["similarity"]
+        if margin < self.min_margin:
+            return f"margin {margin:.2f}"
+
+        # The page must be about the entity asked for: its title, or a known
+        # character's full name, e.g. "Jackie" -> "Jackie Welles"
+        wanted, title = _normalize(entity), _normalize(top["title"])
+        characters = {_normalize(name) for name in character_list}
+        if title != wanted and not (wanted in characters and title.split()[:len(wanted.split())] == wanted.split()):
+            return f"top page {top['title']!r} isn't about {entity!r}"
+        return None
+
+    def _extract(self, context: Dict[str, Any]) -> str:
+        """Opening sentences of the first paragraph of a wiki context."""
+        title = context["title"]
+        text = context["text"]
+        if text.startswith(f"{title}: "):
+            text = text[len(title) + 2:]
+        if text.endswith("..."):
+            text = text[:-3]
+
+        paragraphs = [p.strip() for p in text.split("\n") if p.strip()]
+        sentences = _SENTENCE_END_PATTERN.split(paragraphs[0]) if paragraphs else [""]
+        sentences = sentences[:self.max_sentences]
+        # Passages are cut at a fixed length, possibly mid-sentence
+        if len(sentences) > 1 and not sentences[-1].endswith((".", "!", "?", '"')):
+            sentences = sentences[:-1]
+        return f"**{title}**: {' '.join(sentences[:self.max_sentences])}"
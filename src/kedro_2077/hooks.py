@@ -0,0 +1,398 @@
+"""Project hooks."""
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from kedro.framework.hooks import hook_impl
+from kedro.io import AbstractDataset
+from kedro.pipeline import Node, Pipeline
+
+from kedro_2077 import index_store
+
+logger = logging.getLogger(__name__)
+
+ProgressListener = Callable[[int, int, str], None]
+
+
+def _when_streams_end(outputs: Dict[str, Any], callback: Callable[[bool], None]) -> bool:
+    """
+    Defer ``callback`` until the output streams of a generator node are consumed.
+
+    Kedro calls ``after_node_run`` as soon as a generator node has returned its
+    iterators, before any chunk was produced or saved. The runner reads the
+    streams from ``outputs`` after the hook, so they're replaced by wrappers that
+    call ``callback(failed)`` once, when the first stream ends (the runner stops
+    there) or fails, i.e. after the last chunk was saved.
+
+    Returns:
+        Whether ``outputs`` were streams. If not, ``callback`` isn't called.
+    """
+    if not outputs or not all(isinstance(data, Iterator) for data in outputs.values()):
+        return False
+
+    called = False
+
+    def wrap(stream: Iterator[Any]) -> Iterator[Any]:
+        nonlocal called
+        failed = True
+        try:
+            yield from stream
+            failed = False
+        finally:
+            if not called:
+                called = True
+                callback(failed)
+
+    for name, stream in outputs.items():
+        outputs[name] = wrap(stream)
+    return True
+
+
+class ProgressHooks:
+    """
+    Report per-node progress of a run to a listener registered for its session.
+
+    The listener is called from the thread running the pipeline with
+    ``(completed_nodes, total_nodes, node_name)`` after every node.
+
+    Example:
+        >>> with KedroSession.create(project_path=project_path) as session:
+        ...     progress_hooks.watch(session.session_id, print)
+        ...     session.run(pipeline_name="process_transcript")
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: Dict[str, ProgressListener] = {}
+        self._runs: Dict[str, Dict[str, int]] = {}
+
+    def watch(self, session_id: str, listener: ProgressListener) -> None:
+        with self._lock:
+            self._listeners[session_id] = listener
+
+    @hook_impl
+    def before_pipeline_run(self, run_params: Dict[str, Any], pipeline: Pipeline) -> None:
+        session_id = run_params.get("session_id")
+        with self._lock:
+            if session_id in self._listeners:
+                self._runs[session_id] = {"done": 0, "total": len(pipeline.nodes)}
+
+    @hook_impl
+    def after_node_run(self, node: Node, run_id: str, outputs: Dict[str, Any]) -> None:
+        with self._lock:
+            if run_id not in self._runs:
+                return
+        # A generator node is only done once its last chunk was saved
+        if not _when_streams_end(outputs, lambda failed: None if failed else self._report(node, run_id)):
+            self._report(node, run_id)
+
+    def _report(self, node: Node, run_id: str) -> None:
+        with self._lock:
+            listener = self._listeners.get(run_id)
+            run = self._runs.get(run_id)
+            if listener is None or run is None:
+                return
+            run["done"] += 1
+            done, total = run["done"], run["total"]
+        listener(done, total, node.name)
+
+    @hook_impl
+    def after_pipeline_run(self, run_params: Dict[str, Any]) -> None:
+        self._forget(run_params.get("session_id"))
+
+    @hook_impl
+    def on_pipeline_error(self, run_params: Dict[str, Any]) -> None:
+        self._forget(run_params.get("session_id"))
+
+    def _forget(self, session_id: str) -> None:
+        with self._lock:
+            self._listeners.pop(session_id, None)
+            self._runs.pop(session_id, None)
+
+
+progress_hooks = ProgressHooks()
+
+
+class IndexStagingHooks:
+    """
+    Stage every run that would write into the active index version.
+
+    Without the ``index_dir`` runtime parameter the processed datasets resolve
+    to the active version, and a plain ``kedro run --pipeline=process_transcript``
+    would overwrite the files queries and server workers are reading (or have
+    memory-mapped). Such runs have their index outputs redirected into a new
+    ``index_store.staging()`` directory instead, which is activated when the run
+    succeeds and deleted when it fails. Runs given an ``index_dir`` are left alone.
+    The index store is anchored to the project of the session, like the catalog.
+    """
+
+    PATH_KEYS = ("filepath", "path")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stagings: Dict[str, ExitStack] = {}
+
+    @hook_impl
+    def after_context_created(self, context: Any) -> None:
+        index_store.set_project_path(context.project_path)
+
+    @hook_impl
+    def before_pipeline_run(self, run_params: Dict[str, Any], pipeline: Pipeline, catalog: Any) -> None:
+        if (run_params.get("runtime_params") or {}).get("index_dir"):
+            return
+
+        # Catalog paths are made absolute against the project path
+        active = Path(index_store.active_dir()).resolve()
+        config, _, load_versions, save_version = catalog.to_config()
+        outputs = {
+            name: (key, Path(config[name][key]).resolve())
+            for name in pipeline.all_outputs()
+            for key in self.PATH_KEYS
+            if name in config and key in config[name] and active in Path(config[name][key]).resolve().parents
+        }
+        if not outputs:
+            return
+
+        staging = ExitStack()
+        _, staging_dir = staging.enter_context(index_store.staging())
+        for name, (key, path) in outputs.items():
+            dataset_config = {**config[name], key: str(Path(staging_dir).resolve() / path.relative_to(active))}
+            catalog[name] = AbstractDataset.from_config(name, dataset_config, load_versions.get(name), save_version)
+        with self._lock:
+            self._stagings[run_params.get("session_id")] = staging
+        logger.info("Writing the index into %s, activated once the run succeeds", staging_dir)
+
+    @hook_impl
+    def after_pipeline_run(self, run_params: Dict[str, Any]) -> None:
+        staging = self._pop(run_params.get("session_id"))
+        if staging is not None:
+            staging.close()
+
+    @hook_impl
+    def on_pipeline_error(self, error: Exception, run_params: Dict[str, Any]) -> None:
+        staging = self._pop(run_params.get("session_id"))
+        if staging is not None:
+            staging.__exit__(type(error), error, error.__traceback__)
+
+    def _pop(self, session_id: str) -> Optional[ExitStack]:
+        with self._lock:
+            return self._stagings.pop(session_id, None)
+
+
+index_staging_hooks = IndexStagingHooks()
+
+
+class _StackSampler(threading.Thread):
+    """Samples the Python stack of one thread at a fixed interval, as collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="node-stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+@dataclass
+class _NodeProfile:
+    started_at: float
+    profiler: Optional[cProfile.Profile]
+    sampler: _StackSampler
+    snapshot: tracemalloc.Snapshot
+
+
+@dataclass
+class _ProfiledRun:
+    output_dir: Path
+    nodes: Set[str]
+    top_allocations: int
+    sample_interval: float
+    profiles: Dict[str, _NodeProfile] = field(default_factory=dict)
+    summary: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+class NodeProfilingHooks:
+    """
+    Opt-in profiling of node execution with cProfile, tracemalloc and a stack sampler.
+
+    Enabled by the ``profiling.enabled`` parameter or the ``KEDRO_2077_PROFILE``
+    environment variable, for every node or only the ones listed in ``profiling.nodes``
+    (or ``KEDRO_2077_PROFILE_NODES``, comma-separated). For every profiled node it writes,
+    under ``<output_dir>/<session_id>/``:
+
+    - ``<node>.pstats``: cProfile statistics, e.g. for ``snakeviz`` or ``pstats``
+    - ``<node>.allocations.txt``: peak traced memory and the lines that allocated the most
+    - ``<node>.collapsed``: sampled stacks in the collapsed format of ``flamegraph.pl``
+      and ``speedscope``
+
+    plus ``summary.json`` with the wall time and peak memory of every profiled node.
+    Generator nodes are profiled until their last chunk was saved.
+
+    Example:
+        $ KEDRO_2077_PROFILE=1 KEDRO_2077_PROFILE_NODES=parse_transcript kedro run --pipeline=process_transcript
+        $ kedro run --pipeline=process_transcript --params profiling.enabled=true
+    """
+
+    ENV_ENABLED = "KEDRO_2077_PROFILE"
+    ENV_NODES = "KEDRO_2077_PROFILE_NODES"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, _ProfiledRun] = {}
+        self._started_tracemalloc = False
+
+    @hook_impl
+    def before_pipeline_run(self, run_params: Dict[str, Any], catalog: Any) -> None:
+        params = (catalog.load("parameters").get("profiling") or {}) if "parameters" in catalog else {}
+        enabled = params.get("enabled", False) or os.getenv(self.ENV_ENABLED, "").lower() in {"1", "true", "yes"}
+        if not enabled:
+            return
+
+        env_nodes = [name.strip() for name in os.getenv(self.ENV_NODES, "").split(",") if name.strip()]
+        session_id = run_params.get("session_id")
+        run = _ProfiledRun(
+            output_dir=Path(params.get("output_dir", "data/profiles")) / _file_name(session_id),
+            nodes=set(params.get("nodes") or env_nodes),
+            top_allocations=params.get("top_allocations", 25),
+            sample_interval=params.get("sample_interval_ms", 5) / 1000,
+        )
+        run.output_dir.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            self._runs[session_id] = run
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(params.get("traceback_frames", 10))
+                self._started_tracemalloc = True
+        logger.info("Profiling %s into %s", ", ".join(sorted(run.nodes)) or "every node", run.output_dir)
+
+    @hook_impl
+    def before_node_run(self, node: Node, run_id: str) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is None or (run.nodes and node.name not in run.nodes):
+            return
+
+        sampler = _StackSampler(threading.get_ident(), run.sample_interval)
+        profiler: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one profiler can be active at a time, e.g. with nodes running in parallel threads
+            logger.warning("Not running cProfile on node %s: %s", node.name, e)
+            profiler = None
+
+        tracemalloc.reset_peak()
+        snapshot = tracemalloc.take_snapshot()
+        sampler.start()
+        run.profiles[node.name] = _NodeProfile(time.perf_counter(), profiler, sampler, snapshot)
+
+    @hook_impl
+    def after_node_run(self, node: Node, run_id: str, outputs: Dict[str, Any]) -> None:
+        # A generator node does its work while the runner saves its chunks
+        if not _when_streams_end(outputs, lambda failed: self._finish_node(node, run_id)):
+            self._finish_node(node, run_id)
+
+    @hook_impl
+    def on_node_error(self, node: Node, run_id: str) -> None:
+        self._finish_node(node, run_id)
+
+    @hook_impl
+    def after_pipeline_run(self, run_params: Dict[str, Any]) -> None:
+        self._finish_run(run_params.get("session_id"))
+
+    @hook_impl
+    def on_pipeline_error(self, run_params: Dict[str, Any]) -> None:
+        self._finish_run(run_params.get("session_id"))
+
+    def _finish_node(self, node: Node, run_id: str) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+        profile = run.profiles.pop(node.name, None) if run is not None else None
+        if profile is None:
+            return
+
+        elapsed = time.perf_counter() - profile.started_at
+        if profile.profiler is not None:
+            profile.profiler.disable()
+        stacks = profile.sampler.stop()
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().compare_to(profile.snapshot, "lineno")
+
+        name = _file_name(node.name)
+        if profile.profiler is not None:
+            profile.profiler.dump_stats(str(run.output_dir / f"{name}.pstats"))
+        (run.output_dir / f"{name}.collapsed").write_text(
+            "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items())), encoding="utf-8"
+        )
+        (run.output_dir / f"{name}.allocations.txt").write_text(
+            _allocation_report(node.name, elapsed, peak, allocations[:run.top_allocations]), encoding="utf-8"
+        )
+        run.summary[node.name] = {"seconds": round(elapsed, 3), "peak_traced_mb": round(peak / 2**20, 2)}
+        logger.info("Profiled node %s: %.2fs, peak %.1f MB traced", node.name, elapsed, peak / 2**20)
+
+    def _finish_run(self, session_id: str) -> None:
+        with self._lock:
+            run = self._runs.pop(session_id, None)
+            if self._started_tracemalloc and not self._runs:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        if run is not None:
+            for profile in run.profiles.values():
+                if profile.profiler is not None:
+                    profile.profiler.disable()
+                profile.sampler.stop()
+            (run.output_dir / "summary.json").write_text(json.dumps(run.summary, indent=2), encoding="utf-8")
+
+
+def _file_name(name: Optional[str]) -> str:
+    return re.sub(r"[^\w.-]", "_", name or "run")
+
+
+def _allocation_report(
+    node_name: str, elapsed: float, peak: int, allocations: List[tracemalloc.StatisticDiff]
+) -> str:
+    lines = [
+        f"Node: {node_name}",
+        f"Wall time: {elapsed:.3f}s",
+        f"Peak traced memory: {peak / 2**20:.1f} MB",
+        "",
+        f"Top {len(allocations)} allocation sites by growth while the node ran:",
+    ]
+    for stat in allocations:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size_diff / 2**10:+12.1f} KiB {stat.count_diff:+9d} blocks  {frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+node_profiling_hooks = NodeProfilingHooks()
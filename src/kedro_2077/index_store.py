@@ -0,0 +1,236 @@
+"""Versioned storage for the processed index with an atomic active pointer.
+
+Every build writes into its own staging directory under
+``data/processed/versions``. Once the build is complete the directory is
+renamed to its final name and the ``CURRENT`` pointer file is replaced
+atomically, so readers only ever see a complete version. Queries pin the
+version they started with, and versions that are neither active nor pinned
+are garbage-collected.
+
+Pins and running builds are only known to the process holding them. Staging
+directories are never collected until they're older than
+``STALE_STAGING_SECONDS``, so builds of other processes are safe. A version that
+was replaced as the active one is kept for ``DEACTIVATED_GRACE_SECONDS``, which
+covers queries another process started on it before the switch. The query
+server maps the index files and isn't affected.
+
+Paths are anchored to the project root rather than the working directory, like
+the catalog's. ``set_project_path`` re-anchors them for another project.
+
+The catalog resolves processed dataset paths through the ``active_index``
+resolver registered in ``settings.py``, which can be overridden per run with
+the ``index_dir`` runtime parameter.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = Path(__file__).resolve().parents[2] / "data" / "processed"
+VERSIONS_DIR = PROCESSED_DIR / "versions"
+POINTER_FILE = PROCESSED_DIR / "CURRENT"
+STAGING_SUFFIX = ".staging"
+# Staging directories left over by a crashed build are collected after this long
+STALE_STAGING_SECONDS = 24 * 60 * 60
+# Versions replaced as the active one are kept this long for queries still reading them
+DEACTIVATED_GRACE_SECONDS = 10 * 60
+
+_lock = threading.Lock()
+_pinned: Counter = Counter()
+_building: set = set()
+
+
+def set_project_path(project_path: Union[str, Path]) -> None:
+    """Store versions under ``data/processed`` of ``project_path``, whatever the working directory."""
+    global PROCESSED_DIR, VERSIONS_DIR, POINTER_FILE
+    PROCESSED_DIR = Path(project_path).resolve() / "data" / "processed"
+    VERSIONS_DIR = PROCESSED_DIR / "versions"
+    POINTER_FILE = PROCESSED_DIR / "CURRENT"
+
+
+def new_version() -> str:
+    """Return a new, lexicographically sortable version name."""
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return f"{timestamp}-{uuid.uuid4().hex[:6]}"
+
+
+def version_dir(version: str) -> Path:
+    return VERSIONS_DIR / version
+
+
+def active_version() -> Optional[str]:
+    """Return the name of the active version, or ``None`` if nothing was built yet."""
+    try:
+        version = POINTER_FILE.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def version_of(index_dir: Optional[str]) -> str:
+    """Return the version name of an index directory, or ``""`` for the unversioned layout."""
+    if not index_dir:
+        return active_version() or ""
+    path = Path(index_dir).resolve()
+    return path.name if path.parent == VERSIONS_DIR.resolve() else ""
+
+
+def active_dir() -> str:
+    """
+    Return the directory of the active version.
+
+    Falls back to ``data/processed`` itself when no versioned build exists,
+    which keeps the pre-versioning layout readable.
+    """
+    version = active_version()
+    return str(version_dir(version)) if version else str(PROCESSED_DIR)
+
+
+def activate(version: str) -> None:
+    """
+    Atomically point ``CURRENT`` at ``version``.
+
+    The version it replaces is touched, which starts its grace period in
+    ``collect_garbage``.
+    """
+    if not version_dir(version).is_dir():
+        raise FileNotFoundError(f"Index version '{version}' does not exist")
+
+    previous = active_version()
+    tmp_pointer = POINTER_FILE.with_name(f"{POINTER_FILE.name}.{uuid.uuid4().hex}")
+    tmp_pointer.write_text(version, encoding="utf-8")
+    os.replace(tmp_pointer, POINTER_FILE)
+    if previous and previous != version:
+        try:
+            os.utime(version_dir(previous))
+        except FileNotFoundError:
+            pass
+    logger.info("Activated index version %s", version)
+
+
+@contextmanager
+def pinned() -> Iterator[str]:
+    """
+    Pin the active version for the duration of a query.
+
+    Yields the directory to pass as the ``index_dir`` runtime parameter. The
+    version is not garbage-collected by this process while at least one query
+    holds it, even if a newer build has been activated in the meantime.
+    """
+    with _lock:
+        version = active_version()
+        if version:
+            _pinned[version] += 1
+    try:
+        yield str(version_dir(version)) if version else str(PROCESSED_DIR)
+    finally:
+        if version:
+            with _lock:
+                _pinned[version] -= 1
+                if _pinned[version] <= 0:
+                    del _pinned[version]
+            collect_garbage()
+
+
+@contextmanager
+def staging() -> Iterator[Tuple[str, str]]:
+    """
+    Stage a new version and activate it if the block completes without errors.
+
+    Yields ``(version, staging_dir)``; the build should write into ``staging_dir``.
+    On failure the staging directory is removed and the active version is untouched.
+    """
+    version = new_version()
+    staging_dir = VERSIONS_DIR / f"{version}{STAGING_SUFFIX}"
+    staging_dir.mkdir(parents=True)
+    with _lock:
+        _building.add(staging_dir.name)
+
+    try:
+        yield version, str(staging_dir)
+        os.replace(staging_dir, version_dir(version))
+        activate(version)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    finally:
+        with _lock:
+            _building.discard(staging_dir.name)
+        collect_garbage()
+
+
+def list_versions() -> List[str]:
+    """Return completed versions, oldest first."""
+    if not VERSIONS_DIR.is_dir():
+        return []
+    return sorted(
+        p.name for p in VERSIONS_DIR.iterdir() if p.is_dir() and not p.name.endswith(STAGING_SUFFIX)
+    )
+
+
+def _is_older_than(path: Path, max_age: float) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime > max_age
+    except FileNotFoundError:
+        return False
+
+
+def collect_garbage(
+    keep: int = 1,
+    stale_staging_seconds: Optional[float] = None,
+    grace_seconds: Optional[float] = None,
+) -> List[str]:
+    """
+    Delete versions that are no longer needed.
+
+    Staging directories of builds still running in any process are kept, only
+    the ones older than ``stale_staging_seconds`` are considered abandoned.
+    Completed versions are kept for ``grace_seconds`` after they were built or
+    replaced as the active version, since other processes may still be reading them.
+
+    Args:
+        keep: Number of most recent completed versions to keep, the active one included.
+        stale_staging_seconds: Age after which a staging directory is deleted,
+            ``STALE_STAGING_SECONDS`` by default.
+        grace_seconds: Time a replaced version is kept for, ``DEACTIVATED_GRACE_SECONDS``
+            by default.
+
+    Returns:
+        Names of the deleted directories.
+    """
+    if not VERSIONS_DIR.is_dir():
+        return []
+    if stale_staging_seconds is None:
+        stale_staging_seconds = STALE_STAGING_SECONDS
+    if grace_seconds is None:
+        grace_seconds = DEACTIVATED_GRACE_SECONDS
+
+    with _lock:
+        active = active_version()
+        protected = set(list_versions()[-keep:]) if keep > 0 else set()
+        protected.update(_pinned)
+        protected.update(_building)
+        if active:
+            protected.add(active)
+
+        removed = [
+            p.name for p in VERSIONS_DIR.iterdir()
+            if p.is_dir() and p.name not in protected
+            and _is_older_than(p, stale_staging_seconds if p.name.endswith(STAGING_SUFFIX) else grace_seconds)
+        ]
+
+    for name in removed:
+        shutil.rmtree(VERSIONS_DIR / name, ignore_errors=True)
+        logger.info("Removed index version %s", name)
+    return removed
@@ -0,0 +1,275 @@
+"""Resilient LLM client layer.
+
+Wraps a LangChain chat model so every call gets a deadline, retries with
+exponential backoff and jitter, and optionally a hedged second request
+when the first one is slower than the recent p95 latency.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+import urllib.error
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Optional, Set, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying, everything else in the 4xx range is a caller error
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an LLM call does not complete before its deadline."""
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and isinstance(exc, urllib.error.HTTPError):
+        status = exc.code
+    return status if isinstance(status, int) else None
+
+
+def _transport_errors() -> Tuple[Type[BaseException], ...]:
+    """Connection and timeout errors of the standard library and of the HTTP clients that are installed."""
+    errors: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError, urllib.error.URLError)
+    try:
+        import httpx
+
+        errors += (httpx.TransportError,)
+    except ImportError:
+        pass
+    try:
+        import openai
+
+        errors += (openai.APIConnectionError, openai.APITimeoutError)
+    except ImportError:
+        pass
+    return errors
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Decide whether an error raised by the underlying client is worth retrying.
+
+    5xx responses and the status codes in ``RETRYABLE_STATUS_CODES`` are
+    retried, as are connection errors and timeouts, which carry no status code.
+    Anything else, e.g. a ``TypeError`` from a bad request, fails right away.
+    """
+    status = _status_code(exc)
+    if status is not None:
+        return status >= 500 or status in RETRYABLE_STATUS_CODES
+    return isinstance(exc, _transport_errors())
+
+
+class ResilientLLM:
+    """
+    Deadline, retry and hedging policy around any object with an ``invoke`` method.
+
+    Args:
+        llm: The underlying client, usually a ``ChatOpenAI`` instance.
+        timeout: Default end-to-end deadline in seconds for a single ``invoke``,
+            including all retries and backoff sleeps.
+        max_retries: Number of retries after the first attempt.
+        backoff_base: Backoff before the first retry, doubled on every attempt.
+        backoff_max: Upper bound for a single backoff sleep.
+        hedge: Whether to fire a second request when the first one is slow.
+        hedge_after: Hedge delay in seconds used until enough latency samples are collected.
+            ``None`` disables hedging until then.
+        hedge_quantile: Latency quantile used as the hedge delay once warmed up.
+        min_samples: Number of successful calls needed before the quantile is trusted.
+        window: Number of recent latencies kept for the quantile estimate.
+        max_workers: Size of the thread pool running the (possibly hedged) requests.
+        request_timeout: Per-request timeout passed to the underlying ``invoke`` as
+            ``timeout=``, cut to the time left before the deadline, so a request still
+            running when the caller gives up is aborted and frees its thread.
+            ``None`` passes no timeout, for clients whose ``invoke`` doesn't take one.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        llm: Any,
+        timeout: float = 60.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        hedge_after: Optional[float] = None,
+        hedge_quantile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 16,
+        request_timeout: Optional[float] = None,
+    ):
+        self.llm = llm
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.request_timeout = request_timeout
+
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "timeouts": 0}
+
+    def invoke(self, messages: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Call the underlying LLM, retrying and hedging until ``timeout`` runs out.
+
+        Args:
+            messages: Anything the underlying ``invoke`` accepts.
+            timeout: Deadline in seconds for this call. Defaults to ``self.timeout``,
+                which is also used instead of a non-finite value such as ``inf``.
+
+        Raises:
+            LLMTimeoutError: If no attempt succeeded before the deadline.
+            Exception: The last error from the underlying client when it is not
+                retryable or the retries are exhausted.
+        """
+        if timeout is None or not math.isfinite(timeout):
+            timeout = self.timeout
+        deadline = time.monotonic() + timeout
+        self._bump("calls")
+
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(messages, deadline)
+            except LLMTimeoutError:
+                self._bump("timeouts")
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    self._bump("timeouts")
+                    raise LLMTimeoutError(f"LLM deadline exceeded after {attempt + 1} attempts") from e
+                logger.warning("LLM call failed (%s), retrying in %.2fs", e, delay)
+                self._bump("retries")
+                attempt += 1
+                time.sleep(delay)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay after which a hedged request is fired, or ``None`` if hedging is off."""
+        if not self.hedge:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.hedge_after
+        index = min(len(samples) - 1, int(self.hedge_quantile * len(samples)))
+        return samples[index]
+
+    def _attempt(self, messages: Any, deadline: float) -> Any:
+        """Run one attempt, made of a primary request and possibly a hedged one."""
+        pending: Set[Future] = {self._executor.submit(self._timed_invoke, messages, deadline)}
+        primary = next(iter(pending))
+
+        delay = self.hedge_delay()
+        if delay is not None and time.monotonic() + delay < deadline:
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                self._bump("hedges")
+                pending.add(self._executor.submit(self._timed_invoke, messages, deadline))
+
+        error: Optional[BaseException] = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._bump("hedge_wins")
+                    self._cancel(pending)
+                    return future.result()
+                error = future.exception()
+
+        if pending or error is None:
+            # Requests still queued behind a saturated pool are no longer wanted
+            self._cancel(pending)
+            raise LLMTimeoutError("LLM deadline exceeded")
+        raise error
+
+    @staticmethod
+    def _cancel(futures: Set[Future]) -> None:
+        """Cancel requests that haven't started yet, running ones can't be interrupted."""
+        for future in futures:
+            future.cancel()
+
+    def _timed_invoke(self, messages: Any, deadline: float) -> Any:
+        start = time.monotonic()
+        if self.request_timeout is None:
+            result = self.llm.invoke(messages)
+        else:
+            timeout = min(self.request_timeout, deadline - start)
+            if timeout <= 0:
+                raise LLMTimeoutError("LLM deadline exceeded before the request was sent")
+            result = self.llm.invoke(messages, timeout=timeout)
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return result
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+def build_llm(
+    api_key: str,
+    model: str = "gpt-4o-mini",
+    temperature: float = 0.2,
+    base_url: Optional[str] = None,
+    request_timeout: float = 30.0,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    **policy: Any,
+) -> ResilientLLM:
+    """
+    Create a ``ChatOpenAI`` client on a pooled HTTP connection, wrapped in a ``ResilientLLM``.
+
+    The OpenAI client's own retries are disabled so that ``ResilientLLM`` owns
+    the whole retry and deadline policy.
+
+    Args:
+        api_key: OpenAI API key.
+        model: Chat model name.
+        temperature: Sampling temperature.
+        base_url: Alternative API endpoint, e.g. a local stub server.
+        request_timeout: Timeout in seconds for a single HTTP request, shortened to
+            the time left before the deadline of the call it belongs to.
+        max_connections: Connection pool size.
+        max_keepalive_connections: Idle connections kept alive in the pool.
+        **policy: Keyword arguments forwarded to ``ResilientLLM``.
+    """
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+    http_client = httpx.Client(
+        timeout=request_timeout,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+    )
+    chat = ChatOpenAI(
+        api_key=api_key,
+        model=model,
+        temperature=temperature,
+        base_url=base_url,
+        timeout=request_timeout,
+        max_retries=0,
+        http_client=http_client,
+    )
+    return ResilientLLM(chat, request_timeout=request_timeout, **policy)
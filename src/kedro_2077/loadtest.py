@@ -0,0 +1,262 @@
+"""Load-test harness for the Discord query path.
+
+Replays a query log at a configurable arrival rate through the same code the
+``/query`` command runs (``serving.run_query`` on ``asyncio.to_thread``), with
+the LLM replaced by a local stub server that has a realistic latency
+distribution. No Discord connection is needed, but the processed index must
+have been built.
+
+The answer cache and the entity lookup fast path are off by default, so every
+query goes through the whole pipeline and reaches the LLM. ``--with-cache``
+runs with a fresh cache in a temporary file; the bot's cache is never touched,
+so stub answers can't end up served to users. ``--with-fast-path`` turns the
+fast path on. Degradation records go to ``--degradation-log`` (a temporary
+file by default) instead of the bot's log, and are summed up in the report.
+
+Usage:
+    python -m kedro_2077.loadtest --rate 5 --duration 60 --output data/logs/loadtest.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from kedro_2077.serving import parse_query_log, run_query
+from kedro_2077.stub_llm import StubLLMServer, lognormal_latency, random_failures
+
+DEFAULT_QUERIES = [
+    "What is the main plot of the game?",
+    "Who is Johnny Silverhand?",
+    "Tell me about Jackie Welles.",
+    "What happened at Arasaka Tower?",
+    "Who is Judy Alvarez?",
+]
+
+
+def load_queries(query_log: Optional[Path]) -> List[str]:
+    """Read the queries to replay, falling back to a few canned ones without a log."""
+    if query_log is None or not query_log.exists():
+        return list(DEFAULT_QUERIES)
+    return parse_query_log(query_log.read_text(encoding="utf-8")) or list(DEFAULT_QUERIES)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, ``q`` in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(q / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def degradation_levels(path: Path, offset: int = 0) -> Dict[str, int]:
+    """Count the degradation levels logged to ``path`` from byte ``offset`` on."""
+    if not path.exists():
+        return {}
+    with path.open("rb") as f:
+        f.seek(offset)
+        records = [json.loads(line) for line in f.read().decode("utf-8").splitlines() if line.strip()]
+    return dict(Counter(record["level_name"] for record in records))
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MB, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class LoadTest:
+    """
+    Open-loop load generator: arrivals don't wait for earlier queries to finish,
+    so queueing shows up as growing latency and queue depth instead of a lower rate.
+    """
+
+    def __init__(self, queries: List[str], rate: float, duration: float, poisson: bool = True, seed: Optional[int] = None):
+        self.queries = queries
+        self.rate = rate
+        self.duration = duration
+        self.poisson = poisson
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.started = 0
+        self.finished = 0
+        self.errors = 0
+        self.latencies: List[float] = []
+        self.timeline: List[Dict[str, Any]] = []
+
+    async def _one(self, query: str) -> None:
+        self.submitted += 1
+        submitted_at = time.perf_counter()
+
+        def run() -> Optional[str]:
+            # Counted when a worker thread picks the query up, the gap is queueing
+            with self._lock:
+                self.started += 1
+            return run_query(query, log=False)
+
+        try:
+            await asyncio.to_thread(run)
+            self.latencies.append(time.perf_counter() - submitted_at)
+        except Exception:
+            self.errors += 1
+        finally:
+            self.finished += 1
+
+    async def _sample(self, start: float, interval: float) -> None:
+        while True:
+            self.timeline.append({
+                "t": round(time.perf_counter() - start, 2),
+                "queue_depth": self.submitted - self.started,
+                "in_flight": self.started - self.finished,
+                "completed": self.finished,
+                "rss_mb": round(current_rss_mb(), 1),
+            })
+            await asyncio.sleep(interval)
+
+    async def run(self, sample_interval: float = 1.0) -> Dict[str, Any]:
+        start = time.perf_counter()
+        sampler = asyncio.create_task(self._sample(start, sample_interval))
+
+        tasks = []
+        next_arrival = 0.0
+        while next_arrival < self.duration:
+            delay = next_arrival - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            query = self.queries[len(tasks) % len(self.queries)]
+            tasks.append(asyncio.create_task(self._one(query)))
+            gap = self.rng.expovariate(self.rate) if self.poisson else 1 / self.rate
+            next_arrival += gap
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "offered_rate": self.rate,
+            "submitted": self.submitted,
+            "completed": len(self.latencies),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_qps": round(len(self.latencies) / elapsed, 3) if elapsed else 0.0,
+            "latency_s": {
+                "p50": percentile(self.latencies, 50),
+                "p95": percentile(self.latencies, 95),
+                "p99": percentile(self.latencies, 99),
+                "max": max(self.latencies, default=None),
+            },
+            "max_queue_depth": max((s["queue_depth"] for s in self.timeline), default=0),
+            "peak_rss_mb": max((s["rss_mb"] for s in self.timeline), default=None),
+            "timeline": self.timeline,
+        }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def fmt(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.3f}s"
+
+    latency = report["latency_s"]
+    print("\n📈 Load test results")
+    print(f"  offered rate:  {report['offered_rate']} q/s")
+    print(f"  answer cache:  {'fresh, temporary' if report.get('answer_cache') else 'off'}")
+    print(f"  fast path:     {'on' if report.get('fast_path') else 'off'}")
+    print(f"  completed:     {report['completed']}/{report['submitted']} ({report['errors']} errors)")
+    print(f"  throughput:    {report['throughput_qps']} q/s")
+    print(f"  latency:       p50 {fmt(latency['p50'])}  p95 {fmt(latency['p95'])}  p99 {fmt(latency['p99'])}")
+    print(f"  queue depth:   max {report['max_queue_depth']}")
+    print(f"  memory:        peak {report['peak_rss_mb']} MB")
+    if report.get("degradation_levels"):
+        levels = ", ".join(f"{level} {count}" for level, count in report["degradation_levels"].items())
+        print(f"  degradation:   {levels}")
+    print("\n     t   queue  in-flight  completed   rss MB")
+    for sample in report["timeline"]:
+        print(f"{sample['t']:6.1f} {sample['queue_depth']:7d} {sample['in_flight']:10d} {sample['completed']:10d} {sample['rss_mb']:8.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path, default=Path("data/logs/queries.jsonl"), help="Query log to replay")
+    parser.add_argument("--rate", type=float, default=2.0, help="Arrival rate in queries per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to keep generating arrivals")
+    parser.add_argument("--constant", action="store_true", help="Evenly spaced arrivals instead of Poisson")
+    parser.add_argument("--workers", type=int, default=None, help="Thread pool size, defaults to asyncio's own")
+    parser.add_argument("--llm-median", type=float, default=1.5, help="Median stub LLM latency in seconds")
+    parser.add_argument("--llm-sigma", type=float, default=0.6, help="Log-normal sigma of the stub LLM latency")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.01, help="Share of stub LLM requests failing with a 500")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between timeline samples")
+    parser.add_argument("--with-cache", action="store_true", help="Use a fresh answer cache in a temporary file")
+    parser.add_argument("--with-fast-path", action="store_true", help="Answer entity lookups without the LLM")
+    parser.add_argument(
+        "--degradation-log", type=Path, default=None, help="Append degradation records here, defaults to a temporary file"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", type=Path, default=None, help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    stub = StubLLMServer(
+        latency=lognormal_latency(args.llm_median, args.llm_sigma, seed=args.seed),
+        fail=random_failures(args.llm_failure_rate, seed=args.seed),
+    ).start()
+    # Read by the query pipeline when it builds its LLM client
+    os.environ["OPENAI_BASE_URL"] = stub.url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    # Nothing the load test writes ends up in the bot's cache or logs
+    temp_dir = tempfile.TemporaryDirectory(prefix="kedro-2077-loadtest-")
+    os.environ["KEDRO_2077_ANSWER_CACHE"] = "1" if args.with_cache else "0"
+    os.environ["KEDRO_2077_ANSWER_CACHE_PATH"] = str(Path(temp_dir.name) / "answer_cache.sqlite")
+    os.environ["KEDRO_2077_FAST_PATH"] = "1" if args.with_fast_path else "0"
+    degradation_log = args.degradation_log or Path(temp_dir.name) / "degradation.jsonl"
+    os.environ["KEDRO_2077_DEGRADATION_LOG"] = str(degradation_log)
+    log_offset = degradation_log.stat().st_size if degradation_log.exists() else 0
+
+    loadtest = LoadTest(
+        load_queries(args.queries), args.rate, args.duration, poisson=not args.constant, seed=args.seed
+    )
+
+    async def run() -> Dict[str, Any]:
+        if args.workers:
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=args.workers))
+        return await loadtest.run(args.sample_interval)
+
+    print(f"🔥 Replaying {len(loadtest.queries)} queries at {args.rate} q/s for {args.duration}s against {stub.url}")
+    try:
+        report = asyncio.run(run())
+        report["degradation_levels"] = degradation_levels(degradation_log, log_offset)
+    finally:
+        stub.stop()
+        temp_dir.cleanup()
+
+    report["stub_llm_requests"] = stub.requests
+    report["answer_cache"] = args.with_cache
+    report["fast_path"] = args.with_fast_path
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -12,5 +12,8 @@ def register_pipelines() -> dict[str, Pipeline]:
         A mapping from pipeline names to ``Pipeline`` objects.
     """
     pipelines = find_pipelines()
-    pipelines["__default__"] = sum(pipelines.values())
+    # Warming the cache needs a query log, which only exists once the bot has been used
+    pipelines["__default__"] = sum(
+        pipeline for name, pipeline in pipelines.items() if name != "warm_answer_cache"
+    )
     return pipelines
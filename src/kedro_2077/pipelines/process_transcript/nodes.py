@@ -3,101 +3,228 @@ This is a boilerplate pipeline 'process_transcript'
 generated using Kedro 1.0.0
 """
 import re
-from typing import Any, Dict, List
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from kedro_2077.dedup import MinHashDeduplicator
+from kedro_2077.transcript_index import TranscriptIndex
+
 _model = SentenceTransformer("all-MiniLM-L6-v2")
 
-def chunk_transcript(transcript: str, chunk_size: int = 1000, overlap: int = 200) -> List[Dict[str, Any]]:
-    """Split the transcript into overlapping chunks for better context."""
-    # Clean up whitespaces
-    cleaned_transcript = re.sub(r'\n+', '\n', transcript.strip())
-    
-    # Split into sentences/paragraphs
-    sentences = re.split(r'(?<=[.!?])\s+', cleaned_transcript)
-    
-    chunks = []
-    start_idx = 0
-    
-    while start_idx < len(sentences):
-        end_idx = min(start_idx + chunk_size, len(sentences))
-        chunk_text = ' '.join(sentences[start_idx:end_idx])
-        
-        chunks.append({
-            'text': chunk_text,
-            'chunk_id': len(chunks),
-            'start_sentence': start_idx,
-            'end_sentence': end_idx - 1,
-            'character_count': len(chunk_text)
-        })
-        
-        # Move start_idx forward by chunk_size - overlap
-        start_idx = max(start_idx + chunk_size - overlap, start_idx + 1)
-    
-    return chunks
-
-
-def extract_characters(transcript: str) -> List[str]:
-    """Extract unique character names from the transcript."""
-    # Pattern to match character names (usually followed by a colon)
-    character_pattern = r'^([A-Za-z\s]+):'
-    
-    characters = set()
-    for line in transcript.split('\n'):
-        match = re.match(character_pattern, line.strip())
-        if match:
-            character_name = match.group(1).strip()
-            if character_name and len(character_name) > 1:
-                characters.add(character_name)
-    
-    return sorted(list(characters))
-
-
-def partition_transcript_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    """Convert a list of chunk dicts into a partition mapping for Kedro's PartitionedDataset.
-
-    Returns a dict where keys are partition names and values are the chunk payloads.
-    Example: {"chunk_0": { ...chunk data... }, "chunk_1": { ... }}
+# Indentation and speaker at the start of a line (character names are usually followed by a colon)
+_LINE_START = rb'(?P<indent>\s*)(?:(?P<speaker>[A-Za-z][A-Za-z \t]*):)?'
+# The first line starts the first sentence
+_FIRST_LINE_PATTERN = re.compile(rb'(?P<sentence>)' + _LINE_START)
+# A newline starts a line, end punctuation followed by whitespace starts a sentence, and both
+# at once when the whitespace holds the newline. Every match starts with one of [.!?\n], which
+# lets the regex engine skip ahead to those bytes.
+_BOUNDARY_PATTERN = re.compile(
+    rb'[.!?\n](?:(?:(?<=\n)|(?P<sentence>[ \t\r\f\v]*\n))' + _LINE_START + rb'|\s+)'
+)
+
+
+def parse_transcript(
+    transcript: str, chunk_size: int = 1000, overlap: int = 200
+) -> Tuple[TranscriptIndex, Dict[str, int], Dict[str, List[List[int]]]]:
+    """Parse the transcript in a single scan.
+
+    One regex scan over the cleaned text finds every sentence and line start,
+    together with the speaker of each line.
+
+    Returns:
+        - The transcript index: the cleaned text stored once with sentence and line
+          offsets, and overlapping chunks as sentence ranges over it.
+        - The character list, mapping each speaker to their number of lines.
+        - The speaker-turn index, mapping each speaker to the inclusive line ranges
+          of their consecutive lines, e.g. ``{"Jackie": [[12, 12], [15, 17]]}``.
     """
-    partitions: Dict[str, Dict[str, Any]] = {}
-    for chunk in chunks:
-        chunk_id = chunk.get('chunk_id')
-        if chunk_id is None:
-            # fallback to index position
-            chunk_id = len(partitions)
+    # Clean up whitespaces, on the UTF-8 bytes, which take less memory than a str copy of the
+    # transcript. Only runs of newlines need replacing.
+    cleaned_transcript = re.sub(rb'\n\n+', b'\n', transcript.encode("utf-8").strip())
+
+    sentence_starts = array("I")
+    line_starts = array("I")
+    line_counts: Counter = Counter()
+    speaker_turns: Dict[bytes, List[List[int]]] = {}
+
+    first_line = _FIRST_LINE_PATTERN.match(cleaned_transcript)
+    for match in chain((first_line,), _BOUNDARY_PATTERN.finditer(cleaned_transcript)):
+        position = match.end("indent")
+        if position < 0:
+            # Sentence start within a line
+            sentence_starts.append(match.end())
+            continue
+
+        if match.group("sentence") is not None:
+            sentence_starts.append(position)
+        line_no = len(line_starts)
+        line_starts.append(position)
+
+        speaker = match.group("speaker")
+        if speaker is None:
+            continue
+        speaker = speaker.rstrip()
+        if len(speaker) < 2:
+            continue
+        line_counts[speaker] += 1
+        turns = speaker_turns.setdefault(speaker, [])
+        if turns and turns[-1][1] == line_no - 1:
+            turns[-1][1] = line_no
+        else:
+            turns.append([line_no, line_no])
 
-        partition_key = f"chunk_{chunk_id}"
-        partitions[partition_key] = chunk
+    transcript_index = TranscriptIndex.from_text(
+        cleaned_transcript, sentence_starts, chunk_size, overlap, line_starts=line_starts
+    )
+    character_list = {name.decode("ascii"): count for name, count in sorted(line_counts.items())}
+    speaker_index = {name.decode("ascii"): turns for name, turns in sorted(speaker_turns.items())}
 
-    return partitions
+    return transcript_index, character_list, speaker_index
 
 
-def embed_wiki_pages(wiki_data: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+def deduplicate_transcript_chunks(
+    transcript_index: TranscriptIndex, threshold: float = 0.85, num_perm: int = 128
+) -> Tuple[TranscriptIndex, Dict[str, str]]:
     """
-    Compute embeddings for each wiki page using SentenceTransformer.
+    Drop transcript chunks that are near-duplicates of an earlier chunk.
 
     Args:
-        wiki_data: Dict where keys are page titles and values are plain text content.
+        transcript_index: The parsed transcript.
+        threshold: Estimated Jaccard similarity above which two chunks are duplicates.
+        num_perm: Number of hash functions in the MinHash signatures.
+
     Returns:
-        Dict with structure:
+        - The transcript index with only the canonical chunks left.
+        - Mapping from every removed chunk to the chunk it duplicates, both as
+          ``"start_sentence-end_sentence"`` ranges.
+    """
+    deduplicator = MinHashDeduplicator(threshold=threshold, num_perm=num_perm)
+    for chunk in transcript_index.iter_chunks():
+        deduplicator.add((chunk["start_sentence"], chunk["end_sentence"]), chunk["text"])
+
+    kept = [chunk for chunk in transcript_index.chunks if chunk not in deduplicator.duplicates]
+    duplicates = {
+        f"{start}-{end}": f"{canonical[0]}-{canonical[1]}"
+        for (start, end), canonical in deduplicator.duplicates.items()
+    }
+    print(f"🧹 Removed {len(duplicates)} duplicate transcript chunks, {len(kept)} left.")
+
+    deduplicated = TranscriptIndex(
+        transcript_index.text, transcript_index.sentence_offsets, kept, transcript_index.line_offsets
+    )
+    return deduplicated, duplicates
+
+
+def embed_transcript_chunks(transcript_index: TranscriptIndex, batch_size: int = 64) -> TranscriptIndex:
+    """
+    Compute the embedding of every transcript chunk once, at build time.
+
+    Queries then score all chunks with one matrix-vector product instead of encoding
+    every chunk again. Chunk text is materialized one batch at a time.
+
+    Args:
+        transcript_index: The deduplicated transcript.
+        batch_size: Number of chunks encoded at a time.
+
+    Returns:
+        The transcript index with a ``(chunks, dim)`` float32 matrix of L2-normalized embeddings.
+    """
+    print("🧠 Embedding transcript chunks...")
+    dim = _model.get_sentence_embedding_dimension()
+    embeddings = np.empty((len(transcript_index), dim), dtype=np.float32)
+    for start in tqdm(range(0, len(transcript_index), batch_size)):
+        end = min(start + batch_size, len(transcript_index))
+        texts = [transcript_index.chunk_text(chunk_id) for chunk_id in range(start, end)]
+        embeddings[start:end] = _model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+    print(f"✅ Embedded {len(transcript_index)} transcript chunks successfully.")
+
+    return TranscriptIndex(
+        transcript_index.text, transcript_index.sentence_offsets, transcript_index.chunks,
+        transcript_index.line_offsets, embeddings,
+    )
+
+
+def find_wiki_duplicates(
+    wiki_pages: Iterator[Tuple[str, str]], threshold: float = 0.85, num_perm: int = 128
+) -> Dict[str, str]:
+    """
+    Find wiki pages that are near-duplicates of an earlier page, e.g. redirects and item variants.
+
+    Only MinHash signatures are kept in memory, so the dump is still streamed.
+
+    Args:
+        wiki_pages: Iterator of (page title, plain text content) pairs.
+        threshold: Estimated Jaccard similarity above which two pages are duplicates.
+        num_perm: Number of hash functions in the MinHash signatures.
+
+    Returns:
+        Mapping from every duplicate page title to the title of its canonical page.
+    """
+    print("🧹 Looking for duplicate wiki pages...")
+    deduplicator = MinHashDeduplicator(threshold=threshold, num_perm=num_perm)
+    duplicates = deduplicator.add_all(tqdm(wiki_pages))
+    print(f"✅ Found {len(duplicates)} duplicate pages.")
+    return duplicates
+
+
+def embed_wiki_pages(
+    wiki_pages: Iterator[Tuple[str, str]],
+    wiki_duplicates: Optional[Dict[str, str]] = None,
+    batch_size: int = 64,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Compute embeddings for the wiki pages using SentenceTransformer, in bounded batches.
+
+    Pages are consumed from a stream and every batch is yielded as soon as it's
+    embedded, so Kedro saves it right away and memory stays flat however big the wiki is.
+
+    Args:
+        wiki_pages: Iterator of (page title, plain text content) pairs.
+        wiki_duplicates: Titles of duplicate pages to skip, mapped to their canonical page.
+        batch_size: Number of pages embedded and written out at a time.
+    Yields:
+        Batches with structure:
         {
-            "Page Title": {
-                "text": "...",
-                "embedding": np.ndarray([...])
-            },
-            ...
+            "titles": ["Page Title", ...],
+            "texts": ["...", ...],
+            "embeddings": np.ndarray of shape (len(titles), dim), L2-normalized
         }
     """
 
-    embedded_pages: Dict[str, Dict[str, Any]] = {}
+    def flush(batch: List[Tuple[str, str]]) -> Dict[str, Any]:
+        titles = [title for title, _ in batch]
+        texts = [text for _, text in batch]
+        embeddings = _model.encode(
+            texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True
+        )
+        return {"titles": titles, "texts": texts, "embeddings": embeddings}
 
-    print(f"🧠 Embedding {len(wiki_data)} wiki pages...")
-    for title, text in tqdm(wiki_data.items()):
-        if not text.strip():
+    print("🧠 Embedding wiki pages...")
+    embedded = 0
+    batch: List[Tuple[str, str]] = []
+    wiki_duplicates = wiki_duplicates or {}
+    for title, text in tqdm(wiki_pages):
+        if not text.strip() or title in wiki_duplicates:
             continue
-        embedding = _model.encode(text, convert_to_numpy=True)
-        embedded_pages[title] = {"text": text, "embedding": embedding}
+        batch.append((title, text))
+        if len(batch) >= batch_size:
+            yield flush(batch)
+            embedded += len(batch)
+            batch = []
+
+    if batch:
+        yield flush(batch)
+        embedded += len(batch)
+    elif not embedded:
+        # An index must exist even when every page was empty or a duplicate
+        dim = _model.get_sentence_embedding_dimension()
+        yield {"titles": [], "texts": [], "embeddings": np.empty((0, dim), dtype=np.float32)}
 
-    print(f"✅ Embedded {len(embedded_pages)} pages successfully.")
-    return embedded_pages
\ No newline at end of file
+    print(f"✅ Embedded {embedded} pages successfully.")
@@ -4,33 +4,45 @@ generated using Kedro 1.0.0
 """
 
 from kedro.pipeline import Node, Pipeline
-from .nodes import chunk_transcript, extract_characters, partition_transcript_chunks, embed_wiki_pages
+from .nodes import (
+    deduplicate_transcript_chunks,
+    embed_transcript_chunks,
+    embed_wiki_pages,
+    find_wiki_duplicates,
+    parse_transcript,
+)
 
 def create_pipeline(**kwargs) -> Pipeline:
     """Create the process transcript pipeline."""
     return Pipeline(
         [
             Node(
-                func=chunk_transcript,
-                inputs="cyberpunk_transcript",
-                outputs="raw_transcript_chunks",
-                name="chunk_transcript",
+                func=parse_transcript,
+                inputs=["cyberpunk_transcript", "params:chunk_size", "params:overlap"],
+                outputs=["parsed_transcript", "character_list", "speaker_index"],
+                name="parse_transcript",
             ),
             Node(
-                func=partition_transcript_chunks,
-                inputs="raw_transcript_chunks",
+                func=deduplicate_transcript_chunks,
+                inputs=["parsed_transcript", "params:dedup_threshold", "params:dedup_num_perm"],
+                outputs=["deduplicated_transcript", "transcript_duplicates"],
+                name="deduplicate_transcript_chunks",
+            ),
+            Node(
+                func=embed_transcript_chunks,
+                inputs=["deduplicated_transcript", "params:embedding_batch_size"],
                 outputs="transcript_chunks",
-                name="partition_transcript_chunks",
+                name="embed_transcript_chunks",
             ),
             Node(
-                func=extract_characters,
-                inputs="cyberpunk_transcript",
-                outputs="character_list",
-                name="extract_characters",
+                func=find_wiki_duplicates,
+                inputs=["cyberpunk_wiki", "params:dedup_threshold", "params:dedup_num_perm"],
+                outputs="wiki_duplicates",
+                name="find_wiki_duplicates",
             ),
             Node(
                 func=embed_wiki_pages,
-                inputs="cyberpunk_wiki",
+                inputs=["cyberpunk_wiki", "wiki_duplicates", "params:embedding_batch_size"],
                 outputs="wiki_embeddings",
                 name="embed_wiki_pages_node"
             )
@@ -1,15 +1,28 @@
 """Query pipeline nodes for Cyberpunk 2077 transcript."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from langchain.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import SentenceTransformer
 from pathlib import Path
-import torch
+import json
+import os
+import threading
+import numpy as np
 
 from kedro.config import OmegaConfigLoader
 from kedro.framework.project import settings
 
+from kedro_2077 import index_store
+from kedro_2077.answer_cache import SemanticAnswerCache, context_fingerprint
+from kedro_2077.batching_encoder import BatchingEncoder
+from kedro_2077.deadline import (
+    CACHED_ANSWER, DEGRADATION_LOG, FEWER_CONTEXTS, RETRIEVAL_ONLY, SMALLER_PROMPT, Deadline, log_degradation,
+)
+from kedro_2077.fast_path import EntityLookup
+from kedro_2077.llm_client import LLMTimeoutError, ResilientLLM, build_llm
+from kedro_2077.transcript_index import TranscriptIndex
+from kedro_2077.wiki_index import WikiIndex
+
 
 # Load model once so it doesn't reload per node execution
 _model = SentenceTransformer("all-MiniLM-L6-v2")
@@ -18,37 +31,100 @@ _model = SentenceTransformer("all-MiniLM-L6-v2")
 conf_path = Path(__file__).resolve().parents[4] / settings.CONF_SOURCE
 conf_loader = OmegaConfigLoader(conf_source=str(conf_path))
 credentials = conf_loader["credentials"]
-openai_api_key = credentials["openai"]["api_key"]
+openai_api_key = credentials.get("openai", {}).get("api_key") or os.getenv("OPENAI_API_KEY")
+
+_llm_clients: Dict[str, ResilientLLM] = {}
+_llm_lock = threading.Lock()
+
+
+def get_llm(llm_params: Optional[Dict[str, Any]] = None) -> ResilientLLM:
+    """
+    Return the pooled LLM client for the `llm` parameters, built on first use.
 
-llm = ChatOpenAI(api_key=openai_api_key, model="gpt-4o-mini", temperature=0.2)
+    Runs with the same parameters share one client and its connection pool, so
+    `--params llm.*` and runtime parameters take effect without a client per query.
+    OPENAI_BASE_URL points the client elsewhere, e.g. at the load test's stub server.
+    """
+    params = {**(llm_params or {})}
+    params["base_url"] = os.getenv("OPENAI_BASE_URL") or params.get("base_url")
+    key = json.dumps(params, sort_keys=True, default=str)
+    with _llm_lock:
+        if key not in _llm_clients:
+            _llm_clients[key] = build_llm(api_key=openai_api_key, **params)
+        return _llm_clients[key]
+
+
+# Pooled client with deadline, retry and hedging policy from the `llm` parameters,
+# for callers that don't get the parameters of their run
+llm = get_llm(conf_loader["parameters"].get("llm", {}))
+
+# Semantic answer cache shared by every query run in this process.
+# KEDRO_2077_ANSWER_CACHE=0 turns it off and KEDRO_2077_ANSWER_CACHE_PATH points it
+# at another file, e.g. so the load test doesn't fill the bot's cache with stub answers.
+answer_cache_params = {**conf_loader["parameters"].get("answer_cache", {})}
+answer_cache_enabled = answer_cache_params.pop("enabled", False)
+if os.getenv("KEDRO_2077_ANSWER_CACHE"):
+    answer_cache_enabled = os.getenv("KEDRO_2077_ANSWER_CACHE").lower() in {"1", "true", "yes"}
+if os.getenv("KEDRO_2077_ANSWER_CACHE_PATH"):
+    answer_cache_params["path"] = os.getenv("KEDRO_2077_ANSWER_CACHE_PATH")
+answer_cache = SemanticAnswerCache(**answer_cache_params) if answer_cache_enabled else None
+
+# Extractive answers to "who is X" / "what is Y" questions, skipping the LLM.
+# KEDRO_2077_FAST_PATH=0 turns it off, e.g. so every load test query reaches the LLM.
+fast_path_params = {**conf_loader["parameters"].get("fast_path", {})}
+fast_path_enabled = fast_path_params.pop("enabled", False)
+if os.getenv("KEDRO_2077_FAST_PATH"):
+    fast_path_enabled = os.getenv("KEDRO_2077_FAST_PATH").lower() in {"1", "true", "yes"}
+entity_lookup = EntityLookup(**fast_path_params) if fast_path_enabled else None
+
+# KEDRO_2077_DEGRADATION_LOG writes the degradation records elsewhere, e.g. the load test's own log
+degradation_log = Path(os.getenv("KEDRO_2077_DEGRADATION_LOG") or DEGRADATION_LOG)
+
+# Queries from concurrent runs are encoded together in micro-batches
+query_encoder = BatchingEncoder(_model, **conf_loader["parameters"].get("query_encoder", {}))
+
+
+def start_query_deadline(latency_budget: Dict[str, Any], query_started_at: Optional[float] = None) -> Deadline:
+    """
+    Start the latency budget of a query.
+
+    Args:
+        latency_budget: The `latency_budget` parameters, `seconds` plus the ladder thresholds.
+        query_started_at: `time.monotonic()` value at which the query arrived, defaults to now.
+    """
+    return Deadline(started_at=query_started_at, **latency_budget)
 
 
 def find_relevant_contexts(
     query: str,
-    transcript_chunks: Dict[str, Any],
-    wiki_embeddings: Dict[str, Dict[str, Any]],
-    character_list: List[str],
+    transcript_chunks: TranscriptIndex,
+    wiki_embeddings: WikiIndex,
+    character_list: Dict[str, int],
     max_chunks: int = 5,
     character_bonus: float = 0.05,
-    wiki_weight: float = 0.7
+    wiki_weight: float = 0.7,
+    deadline: Optional[Deadline] = None,
 ) -> List[Dict[str, Any]]:
     """
     Retrieve top relevant contexts from both transcript chunks and wiki embeddings.
 
     Args:
         query: The user query string.
-        transcript_chunks: PartitionedDataset with text chunks.
-        wiki_embeddings: Dict with 'page_title' -> {'text': ..., 'embedding': np.ndarray}.
-        character_list: Character names list to boost relevance.
+        transcript_chunks: Transcript index. With precomputed chunk embeddings, chunks are scored
+            with one matrix-vector product and only the best ones are materialized.
+        wiki_embeddings: Wiki index, pages are scored with one matrix-vector product.
+        character_list: Character names (with their line counts) to boost relevance.
         max_chunks: Max number of transcript chunks to return.
         character_bonus: Similarity boost for character matches.
         wiki_weight: Relative weight of wiki similarity when combining results.
+        deadline: Latency budget. When it runs short, transcript scoring stops early
+            and fewer contexts are returned.
 
     Returns:
         List of the most relevant text contexts (mixed transcript + wiki).
     """
 
-    query_emb = _model.encode(query, convert_to_tensor=True)
+    query_emb = query_encoder.encode(query)
 
     # Characters mentioned in the query
     query_lower = query.lower()
@@ -57,38 +133,54 @@ def find_relevant_contexts(
     results = []
 
     # ---- Transcript similarity ----
-    for chunk_data in transcript_chunks.values():
-        if not isinstance(chunk_data, dict) or "text" not in chunk_data:
-            continue
-        text = chunk_data["text"]
-        emb = _model.encode(text, convert_to_tensor=True)
-        sim = util.cos_sim(query_emb, emb).item()
-
-        if mentioned_characters:
-            for c in mentioned_characters:
-                if c.lower() in text.lower():
-                    sim += character_bonus
-
-        results.append((sim, "transcript", text))
+    if transcript_chunks.embeddings is not None:
+        # Chunk embeddings were computed at build time: score every chunk at once, and only
+        # decode the chunks that can still make the cut once the character bonus is added
+        scores = transcript_chunks.similarities(query_emb)
+        k = min(max_chunks, len(scores))
+        if k > 0:
+            cutoff = np.partition(scores, -k)[-k] - character_bonus * len(mentioned_characters)
+            for chunk_id in np.flatnonzero(scores >= cutoff):
+                text = transcript_chunks.chunk_text(int(chunk_id))
+                sim = float(scores[chunk_id])
+                for c in mentioned_characters:
+                    if c.lower() in text.lower():
+                        sim += character_bonus
+                results.append((sim, "transcript", text, None))
+    else:
+        # Indexes built before chunk embeddings were stored: encode every chunk
+        for chunk_id in range(len(transcript_chunks)):
+            if deadline is not None and deadline.below(deadline.fewer_contexts_below):
+                deadline.degrade(FEWER_CONTEXTS, f"scored {chunk_id} of {len(transcript_chunks)} transcript chunks")
+                break
+            text = transcript_chunks.chunk_text(chunk_id)
+            emb = _model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+            sim = float(np.dot(query_emb, emb))
+
+            if mentioned_characters:
+                for c in mentioned_characters:
+                    if c.lower() in text.lower():
+                        sim += character_bonus
+
+            results.append((sim, "transcript", text, None))
 
     # ---- Wiki similarity ----
-    for title, page in wiki_embeddings.items():
-        # Get embedding and convert to tensor if it isn't already
-        emb = page["embedding"]
-        if not isinstance(emb, torch.Tensor):
-            emb = torch.tensor(emb)
-        text = page["text"]
-
-        sim = util.cos_sim(query_emb, emb).item() * wiki_weight
-        results.append((sim, "wiki", f"{title}: {text[:1000]}..."))
+    # Only the best pages can make the cut, so only their text gets decoded
+    for row, sim in wiki_embeddings.top_k(query_emb, max_chunks):
+        title, text = wiki_embeddings.titles[row], wiki_embeddings.page_text(row)
+        results.append((sim * wiki_weight, "wiki", f"{title}: {text[:1000]}...", title))
 
     # Sort by score
     results.sort(key=lambda x: x[0], reverse=True)
 
+    if deadline is not None and deadline.below(deadline.fewer_contexts_below) and max_chunks > 1:
+        deadline.degrade(FEWER_CONTEXTS, f"kept {max_chunks // 2} of {max_chunks} contexts")
+        max_chunks //= 2
+
     # Return top-N contexts
     top_results = [
-        {"source": src, "text": txt, "similarity": sim}
-        for sim, src, txt in results[:max_chunks]
+        {"source": src, "text": txt, "similarity": sim, "title": title}
+        for sim, src, txt, title in results[:max_chunks]
     ]
 
     return top_results
@@ -99,11 +191,18 @@ def format_prompt_with_context(
     user_query: str,
     contexts: List[Dict[str, Any]],
     max_context_length: int = 2000,
+    deadline: Optional[Deadline] = None,
 ):
     """
     Format a ChatPromptTemplate with the user query and retrieved contexts.
+    When the latency budget runs short, contexts are truncated to a quarter of
+    `max_context_length` so the LLM has less to read.
     """
 
+    if deadline is not None and deadline.below(deadline.smaller_prompt_below):
+        deadline.degrade(SMALLER_PROMPT, f"contexts truncated to {max_context_length // 4} characters")
+        max_context_length //= 4
+
     context_blocks = []
     for ctx in contexts:
         src_label = f"[{ctx['source'].upper()}]"
@@ -121,11 +220,12 @@ def format_prompt_with_context(
 
 
 def query_llm_cli(
-    transcript_chunks: Dict[str, Any] = None,
-    wiki_embeddings: Dict[str, Dict[str, Any]] = None,
-    character_list: List[str] = None,
+    transcript_chunks: TranscriptIndex = None,
+    wiki_embeddings: WikiIndex = None,
+    character_list: Dict[str, int] = None,
     max_context_length: int = 2000,
-    prompt_template: ChatPromptTemplate = None
+    prompt_template: ChatPromptTemplate = None,
+    llm_params: Optional[Dict[str, Any]] = None,
 ) -> None:
     """
     Interactive conversation loop to allow the chat
@@ -164,7 +264,7 @@ def query_llm_cli(
 
         # Append new messages to conversation history
         conversation_history.extend(new_messages)
-        response = llm.invoke(conversation_history)
+        response = get_llm(llm_params).invoke(conversation_history)
 
         print("\n⚪ LLM:", response.content)
         print("\n" + "-" * 80 + "\n")
@@ -173,8 +273,94 @@ def query_llm_cli(
         conversation_history.append({"role": "ai", "content": response.content})
 
 
+def answer_entity_lookup(user_query: str, contexts: List[Dict[str, Any]], character_list: Dict[str, int]) -> str:
+    """
+    Answer "who is X" / "what is Y" questions straight from the top wiki passage.
+
+    Only confident lookups are answered: the top context must be the wiki page of
+    the entity asked about (by title, or a character's full name) and beat the
+    runner-up by the `fast_path.min_margin` similarity margin.
+
+    Returns:
+        The extractive answer, or an empty string when the question should go to the LLM.
+    """
+    if entity_lookup is None or not user_query:
+        return ""
+    return entity_lookup.answer(user_query, contexts, character_list) or ""
+
+
+def retrieval_only_reply(contexts: List[Dict[str, Any]], max_length: int = 400) -> str:
+    """Reply with the top retrieved passages, for when there's no time left for an answer."""
+    if not contexts:
+        return "⏱️ I ran out of time before I could find anything on that, choom. Try again?"
+    passages = [f"**[{ctx['source'].upper()}]** {ctx['text'][:max_length].strip()}…" for ctx in contexts]
+    return "⏱️ I ran out of time to write an answer, here's what I found:\n\n" + "\n\n".join(passages)
+
+
+def answer_query(
+    formatted_prompt: List[Any],
+    user_query: str,
+    contexts: List[Dict[str, Any]],
+    index_dir: str = None,
+    deadline: Optional[Deadline] = None,
+    llm_params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Answer a formatted prompt, going through the semantic answer cache when it's enabled.
+
+    A cached answer is reused when a similar query retrieved the same contexts
+    from the same index version, otherwise the LLM is called and its answer cached.
+
+    With a deadline, the LLM only gets the time left in the budget. If that's not
+    enough, the answer to a similar query is reused even if it was answered from
+    other contexts, and as a last resort the top passages are returned as they are.
+    """
+    llm_client = llm if llm_params is None else get_llm(llm_params)
+    if answer_cache is None and deadline is None:
+        return llm_client.invoke(formatted_prompt).content
+
+    query_emb = None
+    if answer_cache is not None:
+        answer_cache.invalidate(index_store.active_version())
+        index_version = index_store.version_of(index_dir)
+        query_emb = query_encoder.encode(user_query)
+        fingerprint = context_fingerprint(contexts)
+
+        cached = answer_cache.lookup(query_emb, fingerprint, index_version)
+        if cached is not None:
+            return cached
+
+    if deadline is None or not deadline.below(deadline.min_llm_seconds):
+        try:
+            answer = llm_client.invoke(formatted_prompt, timeout=None if deadline is None else deadline.timeout()).content
+        except LLMTimeoutError:
+            if deadline is None:
+                raise
+            deadline.degrade(CACHED_ANSWER, "LLM call timed out")
+        else:
+            if answer_cache is not None:
+                answer_cache.store(user_query, query_emb, fingerprint, index_version, answer)
+            return answer
+    else:
+        deadline.degrade(CACHED_ANSWER, f"{deadline.remaining():.1f}s left, skipped the LLM call")
+
+    if answer_cache is not None:
+        cached = answer_cache.lookup(query_emb, None, index_version)
+        if cached is not None:
+            return cached
+
+    deadline.degrade(RETRIEVAL_ONLY, "no cached answer to a similar question")
+    return retrieval_only_reply(contexts)
+
+
 def query_llm_discord(
     formatted_prompt: List[Dict[str, Any]],
+    user_query: str = None,
+    contexts: List[Dict[str, Any]] = None,
+    index_dir: str = None,
+    deadline: Optional[Deadline] = None,
+    fast_path_answer: str = "",
+    llm_params: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Run a single LLM query for Discord usage.
@@ -184,7 +370,12 @@ def query_llm_discord(
     if not formatted_prompt:
         return "Hey choom, I need a question to answer!"
 
-    # Run LLM
-    response = llm.invoke(formatted_prompt)
-
-    return response.content
+    # Simple entity lookups were already answered from the wiki
+    if fast_path_answer:
+        answer = fast_path_answer
+    else:
+        # Run LLM, or reuse the answer to a paraphrase of the question
+        answer = answer_query(formatted_prompt, user_query, contexts or [], index_dir, deadline, llm_params)
+    if deadline is not None:
+        log_degradation(user_query, deadline, degradation_log)
+    return answer
@@ -1,37 +1,58 @@
 """Query pipeline for Cyberpunk 2077 transcript."""
 
 from kedro.pipeline import Node, Pipeline
-from .nodes import find_relevant_contexts, format_prompt_with_context, query_llm_cli, query_llm_discord
+from .nodes import (
+    answer_entity_lookup,
+    find_relevant_contexts,
+    format_prompt_with_context,
+    query_llm_cli,
+    query_llm_discord,
+    start_query_deadline,
+)
 
 
 def create_pipeline() -> Pipeline:
     """Create the query pipeline."""
     return Pipeline(
         [
+            Node(
+                func=start_query_deadline,
+                inputs=["params:latency_budget", "params:query_started_at"],
+                outputs="query_deadline",
+                name="start_query_deadline",
+                tags=["cli", "discord"],
+            ),
             Node(
                 func=find_relevant_contexts,
-                inputs=["params:user_query", "transcript_chunks", "wiki_embeddings", "character_list", "params:max_chunks", "params:character_bonus", "params:wiki_weight"],
+                inputs=["params:user_query", "transcript_chunks", "wiki_embeddings", "character_list", "params:max_chunks", "params:character_bonus", "params:wiki_weight", "query_deadline"],
                 outputs="relevant_contexts",
                 name="find_relevant_contexts",
                 tags=["cli", "discord"],
             ),
             Node(
                 func=format_prompt_with_context,
-                inputs=["query_prompt", "params:user_query", "relevant_contexts", "params:max_context_length"],
+                inputs=["query_prompt", "params:user_query", "relevant_contexts", "params:max_context_length", "query_deadline"],
                 outputs="formatted_prompt",
                 name="format_prompt_with_context",
                 tags=["cli", "discord"],
             ),
             Node(
                 func=query_llm_cli,
-                inputs=["transcript_chunks", "wiki_embeddings", "character_list", "params:max_context_length", "query_prompt"],
+                inputs=["transcript_chunks", "wiki_embeddings", "character_list", "params:max_context_length", "query_prompt", "params:llm"],
                 outputs="llm_response_cli",
                 name="query_llm_cli",
                 tags=["cli"],
             ),
+            Node(
+                func=answer_entity_lookup,
+                inputs=["params:user_query", "relevant_contexts", "character_list"],
+                outputs="fast_path_answer",
+                name="answer_entity_lookup",
+                tags=["discord"],
+            ),
             Node(
                 func=query_llm_discord,
-                inputs=["formatted_prompt"],
+                inputs=["formatted_prompt", "params:user_query", "relevant_contexts", "params:index_dir", "query_deadline", "fast_path_answer", "params:llm"],
                 outputs="llm_response_discord",
                 name="query_llm_discord",
                 tags=["discord"],
@@ -0,0 +1,85 @@
+"""Offline warm-up of the semantic answer cache from the query log."""
+
+from collections import Counter
+from typing import Any, Dict, List
+
+from langchain.prompts import ChatPromptTemplate
+
+from kedro_2077.pipelines.query_pipeline.nodes import (
+    answer_cache,
+    answer_query,
+    find_relevant_contexts,
+    format_prompt_with_context,
+)
+from kedro_2077.serving import parse_query_log
+from kedro_2077.transcript_index import TranscriptIndex
+from kedro_2077.wiki_index import WikiIndex
+
+
+def most_frequent_queries(query_log: str, top_n: int = 50, min_count: int = 2) -> List[str]:
+    """
+    Pick the most frequently asked questions from the query log.
+
+    Questions are counted case- and whitespace-insensitively, and the first
+    spelling seen is kept.
+    """
+    counts: Counter = Counter()
+    spelling: Dict[str, str] = {}
+    for query in parse_query_log(query_log):
+        key = " ".join(query.lower().split())
+        counts[key] += 1
+        spelling.setdefault(key, query)
+
+    return [spelling[key] for key, count in counts.most_common(top_n) if count >= min_count]
+
+
+def warm_answer_cache(
+    queries: List[str],
+    transcript_chunks: TranscriptIndex,
+    wiki_embeddings: WikiIndex,
+    character_list: Dict[str, int],
+    prompt_template: ChatPromptTemplate,
+    max_chunks: int = 5,
+    max_context_length: int = 2000,
+    character_bonus: float = 0.05,
+    wiki_weight: float = 0.7,
+    index_dir: str = None,
+) -> Dict[str, Any]:
+    """
+    Pre-answer queries through the same retrieval, prompt and cache path as the Discord bot.
+
+    Returns:
+        Summary with the number of queries that were already cached and newly answered.
+    """
+    if answer_cache is None:
+        print("⚠️ The answer cache is disabled, nothing to warm up.")
+        return {"queries": len(queries), "already_cached": 0, "answered": 0}
+
+    print(f"🔥 Warming the answer cache with {len(queries)} frequent questions...")
+    hits_before = answer_cache.stats()["hits"]
+    for query in queries:
+        contexts = find_relevant_contexts(
+            query=query,
+            transcript_chunks=transcript_chunks,
+            wiki_embeddings=wiki_embeddings,
+            character_list=character_list,
+            max_chunks=max_chunks,
+            character_bonus=character_bonus,
+            wiki_weight=wiki_weight,
+        )
+        messages = format_prompt_with_context(
+            prompt_template=prompt_template,
+            user_query=query,
+            contexts=contexts,
+            max_context_length=max_context_length,
+        )
+        answer_query(messages, query, contexts, index_dir)
+
+    already_cached = answer_cache.stats()["hits"] - hits_before
+    summary = {
+        "queries": len(queries),
+        "already_cached": already_cached,
+        "answered": len(queries) - already_cached,
+    }
+    print(f"✅ Answer cache warmed: {summary['answered']} new answers, {already_cached} already cached.")
+    return summary
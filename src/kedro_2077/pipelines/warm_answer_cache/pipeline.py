@@ -0,0 +1,24 @@
+"""Pipeline pre-answering the most frequent questions into the answer cache."""
+
+from kedro.pipeline import Node, Pipeline
+from .nodes import most_frequent_queries, warm_answer_cache
+
+
+def create_pipeline(**kwargs) -> Pipeline:
+    """Create the answer cache warm-up pipeline."""
+    return Pipeline(
+        [
+            Node(
+                func=most_frequent_queries,
+                inputs=["query_log", "params:warmup_top_n", "params:warmup_min_count"],
+                outputs="frequent_queries",
+                name="most_frequent_queries",
+            ),
+            Node(
+                func=warm_answer_cache,
+                inputs=["frequent_queries", "transcript_chunks", "wiki_embeddings", "character_list", "query_prompt", "params:max_chunks", "params:max_context_length", "params:character_bonus", "params:wiki_weight", "params:index_dir"],
+                outputs="answer_cache_warmup",
+                name="warm_answer_cache",
+            ),
+        ]
+    )
@@ -0,0 +1,360 @@
+"""Standalone multi-worker HTTP query server.
+
+The parent process opens the listening socket and pre-forks worker processes
+that all accept connections on it, and respawns workers that die. Every worker
+memory-maps the active index (transcript text, wiki text and wiki embeddings),
+so all workers share a single copy of it through the page cache instead of each
+holding its own. Workers notice when a build activates a new index version and
+map that one for the following requests.
+
+Requests run the Discord flavour of the query pipeline against the mapped
+index, up to ``relevant_contexts`` for retrieval only, with the project hooks
+called as in a ``kedro run``. Every request gets the latency budget of the
+``latency_budget`` parameters from the moment it arrives.
+
+Endpoints:
+    GET  /health     Worker pid and the index version it serves.
+    POST /retrieve   ``{"query": ...}`` -> ``{"contexts": [...], "index_version": ...}``
+    POST /query      ``{"query": ...}`` -> ``{"answer": ..., "contexts": [...], "index_version": ..., "degradation": ...}``
+
+Usage:
+    python -m kedro_2077.server --workers 4 --port 8077
+
+The Discord bot forwards ``/query`` to the server when ``QUERY_SERVER_URL``
+is set, e.g. ``QUERY_SERVER_URL=http://127.0.0.1:8077``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from kedro.framework.hooks import _create_hook_manager, hook_impl
+from kedro.framework.project import pipelines, settings
+from kedro.framework.session import KedroSession
+from kedro.io import DataCatalog, MemoryDataset
+from kedro.pipeline import Pipeline
+from kedro.runner import SequentialRunner
+
+from kedro_2077 import index_store
+from kedro_2077.datasets.transcript_index_dataset import TranscriptIndexDataset
+from kedro_2077.datasets.wiki_index_dataset import WikiIndexDataset
+from kedro_2077.serving import PROJECT_PATH, bootstrap, log_query
+
+logger = logging.getLogger(__name__)
+
+# Pipeline datasets returned to the client
+CONTEXTS_OUTPUT = "relevant_contexts"
+ANSWER_OUTPUT = "llm_response_discord"
+DEADLINE_OUTPUT = "query_deadline"
+
+
+class _OutputRecorder:
+    """
+    Keep the outputs of every node of the runs it's watching.
+
+    The runner releases intermediate datasets once they're consumed, so results
+    like the retrieved contexts are read from here after a run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict[str, Any]] = {}
+
+    def watch(self, run_id: str) -> Dict[str, Any]:
+        """Start recording the outputs of ``run_id`` into the returned dict."""
+        with self._lock:
+            return self._runs.setdefault(run_id, {})
+
+    def forget(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    @hook_impl
+    def after_node_run(self, run_id: str, outputs: Dict[str, Any]) -> None:
+        with self._lock:
+            recorded = self._runs.get(run_id)
+        if recorded is not None:
+            recorded.update(outputs)
+
+
+class MappedIndex:
+    """
+    The active index version, memory-mapped, reloaded when another version gets activated.
+
+    Deleting the files of a mapped version doesn't invalidate the mapping, so an
+    old version stays readable until the last request using it is done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded: Optional[Tuple[str, Dict[str, Any]]] = None
+
+    def get(self) -> Tuple[str, Dict[str, Any]]:
+        """Return the active index directory and its datasets, keyed by catalog name."""
+        index_dir = index_store.active_dir()
+        with self._lock:
+            if self._loaded is None or self._loaded[0] != index_dir:
+                self._loaded = (index_dir, self._load(index_dir))
+                logger.info("Worker %d mapped index %s", os.getpid(), index_dir)
+            return self._loaded
+
+    @staticmethod
+    def _load(index_dir: str) -> Dict[str, Any]:
+        root = Path(index_dir)
+        return {
+            "transcript_chunks": TranscriptIndexDataset(str(root / "transcript"), mmap=True).load(),
+            "wiki_embeddings": WikiIndexDataset(str(root / "wiki"), mmap=True).load(),
+            "character_list": json.loads((root / "character_list.json").read_text(encoding="utf-8")),
+        }
+
+
+class QueryApp:
+    """Runs the query pipeline of one worker process against the mapped index."""
+
+    def __init__(self, project_path: Path = PROJECT_PATH):
+        self.project_path = project_path
+        bootstrap(project_path)
+        with KedroSession.create(project_path=project_path) as session:
+            context = session.load_context()
+            self.params = context.params
+            self.prompt = context.catalog.load("query_prompt")
+
+        # The project hooks, as a session registers them, plus the recorder of node outputs
+        self.outputs = _OutputRecorder()
+        self.hook_manager = _create_hook_manager()
+        for hooks in (*settings.HOOKS, self.outputs):
+            self.hook_manager.register(hooks)
+
+        # Importing the nodes loads the embedding model and LLM client of this worker
+        self.answering = pipelines["query_pipeline"].filter(tags=["discord"])
+        self.retrieval = self.answering.to_outputs(CONTEXTS_OUTPUT)
+        self.index = MappedIndex()
+
+    def retrieve(self, user_query: str, started_at: Optional[float] = None) -> Dict[str, Any]:
+        index_dir, outputs = self._run(self.retrieval, user_query, started_at)
+        return {"contexts": outputs[CONTEXTS_OUTPUT], "index_version": index_store.version_of(index_dir)}
+
+    def answer(self, user_query: str, started_at: Optional[float] = None) -> Dict[str, Any]:
+        index_dir, outputs = self._run(self.answering, user_query, started_at)
+        return {
+            "answer": outputs[ANSWER_OUTPUT],
+            "contexts": outputs[CONTEXTS_OUTPUT],
+            "index_version": index_store.version_of(index_dir),
+            "degradation": outputs[DEADLINE_OUTPUT].summary(),
+        }
+
+    def _run(self, pipeline: Pipeline, user_query: str, started_at: Optional[float]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Run ``pipeline`` for one query and return every dataset its nodes produced.
+
+        The pipeline hooks get the same arguments as in a session run, with the
+        request's id as the session id.
+        """
+        index_dir, datasets = self.index.get()
+        runtime_params = {"user_query": user_query, "index_dir": index_dir, "query_started_at": started_at}
+        params = {**self.params, **runtime_params}
+        entries = {"query_prompt": self.prompt, "parameters": params, **datasets}
+        entries.update({f"params:{name}": value for name, value in params.items()})
+
+        # Shared, read-only objects: mapped buffers can't be copied anyway
+        datasets = {name: MemoryDataset(value, copy_mode="assign") for name, value in entries.items()}
+        datasets.update({name: MemoryDataset(copy_mode="assign") for name in pipeline.all_outputs()})
+        catalog = DataCatalog(datasets=datasets)
+
+        run_id = uuid.uuid4().hex
+        run_params = {
+            "session_id": run_id,
+            "project_path": self.project_path.as_posix(),
+            "pipeline_name": "query_pipeline",
+            "tags": ["discord"],
+            "runtime_params": runtime_params,
+            "runner": SequentialRunner.__name__,
+        }
+        hook = self.hook_manager.hook
+        outputs = self.outputs.watch(run_id)
+        try:
+            hook.before_pipeline_run(run_params=run_params, pipeline=pipeline, catalog=catalog)
+            try:
+                run_result = SequentialRunner().run(pipeline, catalog, self.hook_manager, run_id=run_id)
+            except Exception as error:
+                hook.on_pipeline_error(error=error, run_params=run_params, pipeline=pipeline, catalog=catalog)
+                raise
+            hook.after_pipeline_run(run_params=run_params, run_result=run_result, pipeline=pipeline, catalog=catalog)
+        finally:
+            self.outputs.forget(run_id)
+        return index_dir, outputs
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    server: "WorkerServer"
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") != "/health":
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        index_dir = index_store.active_dir()
+        self._send(200, {"status": "ok", "pid": os.getpid(), "index_version": index_store.version_of(index_dir)})
+
+    def do_POST(self) -> None:
+        self.started_at = time.monotonic()
+        path = self.path.rstrip("/")
+        endpoints = {"/retrieve": self.server.app.retrieve, "/query": self.server.app.answer}
+        endpoint = endpoints.get(path)
+        if endpoint is None:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            user_query = json.loads(self.rfile.read(length) or b"{}").get("query", "").strip()
+        except (ValueError, AttributeError):
+            self._send(400, {"error": "Expected a JSON object with a 'query'"})
+            return
+        if not user_query:
+            self._send(400, {"error": "Expected a JSON object with a 'query'"})
+            return
+
+        try:
+            if path == "/query":
+                log_query(user_query, self.server.app.params.get("query_log"), self.server.app.project_path)
+            self._send(200, endpoint(user_query, self.started_at))
+        except Exception as e:
+            logger.exception("Query %r failed", user_query)
+            self._send(500, {"error": str(e)})
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class WorkerServer(ThreadingHTTPServer):
+    """HTTP server accepting connections on a socket inherited from the parent process."""
+
+    daemon_threads = True
+
+    def __init__(self, sock: socket.socket, app: QueryApp):
+        super().__init__(sock.getsockname()[:2], QueryHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.app = app
+
+
+def _worker(sock: socket.socket, project_path: Path) -> None:
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    app = QueryApp(project_path)
+    app.index.get()
+    logger.info("Worker %d ready", os.getpid())
+    WorkerServer(sock, app).serve_forever()
+
+
+def _spawn(sock: socket.socket, project_path: Path) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    status = 0
+    try:
+        _worker(sock, project_path)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8077, workers: int = 2, project_path: Path = PROJECT_PATH) -> None:
+    """
+    Listen on ``host:port`` and serve queries from ``workers`` pre-forked processes until interrupted.
+
+    Workers that exit are respawned, at most once a second.
+    """
+    sock = socket.create_server((host, port), backlog=128)
+    stopping = False
+
+    def stop(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children: List[int] = [_spawn(sock, project_path) for _ in range(workers)]
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"🚀 Serving queries on http://{host}:{sock.getsockname()[1]} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        if pid not in children:
+            continue
+        children.remove(pid)
+        if not stopping:
+            logger.warning("Worker %d exited with status %d, respawning", pid, os.waitstatus_to_exitcode(status))
+            time.sleep(1)
+            children.append(_spawn(sock, project_path))
+
+    sock.close()
+    print("👋 Query server stopped.")
+
+
+def remote_query(server_url: str, user_query: str, endpoint: str = "query", timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Ask a running query server, e.g. from the Discord bot.
+
+    Raises:
+        RuntimeError: If the server answered with an error.
+    """
+    request = urllib.request.Request(
+        f"{server_url.rstrip('/')}/{endpoint}",
+        data=json.dumps({"query": user_query}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        raise RuntimeError(f"Query server error {e.code}: {message}") from e
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8077)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes, defaults to one per core")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
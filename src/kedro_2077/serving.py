@@ -0,0 +1,146 @@
+"""Blocking entry points shared by the Discord bot and the load-test harness.
+
+Each call bootstraps the Kedro project and runs a pipeline in its own
+``KedroSession``. They are meant to be run off the event loop, e.g. with
+``asyncio.to_thread``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from kedro.framework.project import configure_project, settings
+from kedro.framework.session import KedroSession
+from kedro.framework.startup import bootstrap_project
+from omegaconf import OmegaConf
+
+from kedro_2077 import index_store
+from kedro_2077.hooks import ProgressListener, progress_hooks
+
+PROJECT_PATH = Path(__file__).resolve().parents[2]
+QUERY_LOG = Path("data/logs/queries.jsonl")
+
+_log_lock = threading.Lock()
+_bootstrap_lock = threading.Lock()
+
+
+def bootstrap(project_path: Path = PROJECT_PATH) -> None:
+    with _bootstrap_lock:
+        metadata = bootstrap_project(project_path)
+        configure_project(metadata.package_name)
+        index_store.set_project_path(project_path)
+        # Every config loader registers the custom resolvers it doesn't find, without a
+        # lock, so sessions created from several threads at once can register one twice
+        for name, resolver in settings.CONFIG_LOADER_ARGS.get("custom_resolvers", {}).items():
+            if not OmegaConf.has_resolver(name):
+                OmegaConf.register_new_resolver(name, resolver)
+
+
+def log_query(user_query: str, query_log: Optional[Dict[str, Any]] = None, project_path: Path = PROJECT_PATH) -> None:
+    """
+    Append a query to the JSONL query log used for load tests and cache warm-up.
+
+    Args:
+        query_log: The ``query_log`` parameters. Nothing is written unless ``enabled``
+            is set. Once the log would grow past ``max_bytes`` it's rotated into
+            ``queries.jsonl.1`` ... ``queries.jsonl.<backups>``, dropping the oldest.
+        project_path: The log lives in the project's ``data/logs``.
+    """
+    query_log = query_log or {}
+    if not query_log.get("enabled", False):
+        return
+
+    path = project_path / QUERY_LOG
+    record = (json.dumps({"timestamp": time.time(), "query": user_query}) + "\n").encode("utf-8")
+    max_bytes = query_log.get("max_bytes")
+    with _log_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if max_bytes and path.exists() and path.stat().st_size + len(record) > max_bytes:
+            _rotate(path, query_log.get("backups", 1))
+        with path.open("ab") as f:
+            f.write(record)
+
+
+def _rotate(path: Path, backups: int) -> None:
+    if backups < 1:
+        path.unlink()
+        return
+    for n in range(backups - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{n}")
+        if older.exists():
+            os.replace(older, path.with_name(f"{path.name}.{n + 1}"))
+    os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def parse_query_log(text: str) -> List[str]:
+    """
+    Read queries from a query log, one per line.
+
+    Lines are either JSON objects with a ``query`` key, as written by
+    ``log_query``, or plain text.
+    """
+    queries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            queries.append(record["query"] if isinstance(record, dict) else str(record))
+        except json.JSONDecodeError:
+            queries.append(line)
+    return queries
+
+
+def run_query(user_query: str, project_path: Path = PROJECT_PATH, log: bool = True) -> Optional[str]:
+    """
+    Run the Discord flavour of the query pipeline for one question.
+
+    The active index version is pinned for the whole run, so a concurrent
+    build can't swap it out mid-query. The query's latency budget starts
+    counting when this is called.
+
+    Returns:
+        The LLM answer, or ``None`` if the pipeline produced no response.
+    """
+    started_at = time.monotonic()
+    bootstrap(project_path)
+
+    with index_store.pinned() as index_dir:
+        with KedroSession.create(
+            project_path=project_path,
+            runtime_params={"user_query": user_query, "index_dir": index_dir, "query_started_at": started_at}
+        ) as session:
+            if log:
+                log_query(user_query, session.load_context().params.get("query_log"), project_path)
+            result = session.run(pipeline_name="query_pipeline", tags=["discord"])
+
+    llm_memory_dataset = result.get("llm_response_discord")
+    return llm_memory_dataset.load() if llm_memory_dataset else None
+
+
+def build_index(progress: Optional[ProgressListener] = None, project_path: Path = PROJECT_PATH) -> str:
+    """
+    Run the ``process_transcript`` pipeline into a new index version and activate it.
+
+    Args:
+        progress: Called with ``(completed_nodes, total_nodes, node_name)`` after every node.
+
+    Returns:
+        The name of the new active version.
+    """
+    bootstrap(project_path)
+
+    with index_store.staging() as (version, staging_dir):
+        with KedroSession.create(
+            project_path=project_path,
+            runtime_params={"index_dir": staging_dir}
+        ) as session:
+            if progress is not None:
+                progress_hooks.watch(session.session_id, progress)
+            session.run(pipeline_name="process_transcript")
+    return version
@@ -2,11 +2,12 @@
 from the Kedro defaults. For further information, including these default values, see
 https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 
+from kedro_2077.hooks import index_staging_hooks, node_profiling_hooks, progress_hooks
+from kedro_2077.index_store import active_dir
+
 # Instantiated project hooks.
-# For example, after creating a hooks.py and defining a ProjectHooks class there, do
-# from 2077_langchain_test.hooks import ProjectHooks
 # Hooks are executed in a Last-In-First-Out (LIFO) order.
-# HOOKS = (ProjectHooks(),)
+HOOKS = (progress_hooks, node_profiling_hooks, index_staging_hooks)
 
 # Installed plugins for which to disable hook auto-registration.
 # DISABLE_HOOKS_FOR_PLUGINS = ("kedro-viz",)
@@ -31,6 +32,10 @@ https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 CONFIG_LOADER_ARGS = {
     "base_env": "base",
     "default_run_env": "local",
+    # Processed datasets live in the active index version, see index_store.py
+    "custom_resolvers": {
+        "active_index": active_dir,
+    },
     # "config_patterns": {
     #     "spark" : ["spark*/"],
     #     "parameters": ["parameters*", "parameters*/**", "**/parameters*"],
@@ -0,0 +1,140 @@
+"""Local stub of the OpenAI chat completions API.
+
+Answers ``POST /v1/chat/completions`` with a canned reply after an injected
+delay, and fails a configurable share of requests with a 500, so the client
+layer can be exercised against slow and flaky upstreams without network access.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+
+def _no_latency(request_number: int) -> float:
+    return 0.0
+
+
+def _never_fail(request_number: int) -> bool:
+    return False
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: Optional[int] = None) -> Callable[[int], float]:
+    """Latency sampler with a long right tail, the usual shape of LLM API response times."""
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda request_number: rng.lognormvariate(mu, sigma)
+
+
+def random_failures(rate: float, seed: Optional[int] = None) -> Callable[[int], bool]:
+    """Fail each request independently with probability ``rate``."""
+    rng = random.Random(seed)
+    return lambda request_number: rng.random() < rate
+
+
+class StubLLMServer:
+    """
+    OpenAI-compatible stub server running in a background thread.
+
+    Args:
+        reply: Content of every assistant message.
+        latency: Called with the 0-based request number, returns the delay in seconds.
+        fail: Called with the 0-based request number, returns whether to answer with a 500.
+        host: Interface to bind to.
+        port: Port to bind to, ``0`` picks a free one.
+
+    Example:
+        >>> with StubLLMServer(latency=lambda n: 0.05) as server:
+        ...     llm = build_llm(api_key="stub", base_url=server.url)
+    """
+
+    def __init__(
+        self,
+        reply: str = "Wake the f*** up, samurai.",
+        latency: Callable[[int], float] = _no_latency,
+        fail: Callable[[int], bool] = _never_fail,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.reply = reply
+        self.latency = latency
+        self.fail = fail
+        self.requests = 0
+        self._counter = itertools.count()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _completion(self, model: str) -> dict:
+        return {
+            "id": f"chatcmpl-stub-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self.reply},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def _make_handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                number = next(stub._counter)
+                stub.requests += 1
+                time.sleep(stub.latency(number))
+
+                if stub.fail(number):
+                    status, body = 500, {"error": {"message": "injected failure", "type": "server_error"}}
+                else:
+                    status, body = 200, stub._completion(payload.get("model", "stub"))
+
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
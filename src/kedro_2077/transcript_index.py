@@ -0,0 +1,130 @@
+"""Sentence-offset representation of the transcript.
+
+The cleaned transcript is kept once as a UTF-8 buffer together with the byte
+offset at which every sentence starts. Chunks are plain
+``(start_sentence, end_sentence)`` ranges over that buffer, so overlapping
+chunks share their text instead of each holding a copy of it, and a chunk's
+text is only materialized when it is asked for. Chunk embeddings, when they were
+computed at build time, are a float32 matrix with one L2-normalized row per chunk,
+so scoring a query against every chunk is one matrix-vector product.
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Chunk = Tuple[int, int]
+
+
+def chunk_ranges(sentence_count: int, chunk_size: int = 1000, overlap: int = 200) -> List[Chunk]:
+    """
+    Split ``sentence_count`` sentences into overlapping, inclusive sentence ranges.
+
+    Consecutive chunks start ``chunk_size - overlap`` sentences apart, and always
+    at least one sentence apart.
+    """
+    chunks = []
+    start_idx = 0
+    while start_idx < sentence_count:
+        end_idx = min(start_idx + chunk_size, sentence_count)
+        chunks.append((start_idx, end_idx - 1))
+        start_idx = max(start_idx + chunk_size - overlap, start_idx + 1)
+    return chunks
+
+
+class TranscriptIndex:
+    """
+    Transcript buffer plus sentence offsets and chunk ranges.
+
+    Args:
+        text: The cleaned transcript encoded as UTF-8. Any buffer works, e.g. ``bytes`` or an ``mmap``.
+        sentence_offsets: Byte offset where each sentence starts, followed by the buffer length,
+            so sentence ``i`` spans ``text[sentence_offsets[i]:sentence_offsets[i + 1]]``.
+        chunks: Inclusive ``(start_sentence, end_sentence)`` range of every chunk.
+        line_offsets: Optional byte offset where each line starts, followed by the buffer length.
+            Needed to resolve the line ranges of the speaker-turn index.
+        embeddings: Optional ``(chunks, dim)`` float32 matrix of L2-normalized chunk embeddings.
+            Indexes built before embeddings were stored don't have it.
+    """
+
+    def __init__(
+        self,
+        text: Any,
+        sentence_offsets: Sequence[int],
+        chunks: Sequence[Chunk],
+        line_offsets: Optional[Sequence[int]] = None,
+        embeddings: Optional[np.ndarray] = None,
+    ):
+        self.text = text
+        self.sentence_offsets = sentence_offsets
+        self.chunks = [tuple(chunk) for chunk in chunks]
+        self.line_offsets = line_offsets
+        self.embeddings = embeddings
+
+    @classmethod
+    def from_text(
+        cls,
+        text: bytes,
+        sentence_starts: Sequence[int],
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        line_starts: Optional[Sequence[int]] = None,
+    ) -> "TranscriptIndex":
+        """Build an index from a buffer and the byte offsets where its sentences (and lines) start."""
+        offsets = array("I", sentence_starts)
+        offsets.append(len(text))
+
+        line_offsets = None
+        if line_starts is not None:
+            line_offsets = array("I", line_starts)
+            line_offsets.append(len(text))
+
+        return cls(text, offsets, chunk_ranges(len(offsets) - 1, chunk_size, overlap), line_offsets)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_offsets) - 1
+
+    def sentence_span(self, start_sentence: int, end_sentence: int) -> str:
+        """Materialize the text of an inclusive sentence range."""
+        start = self.sentence_offsets[start_sentence]
+        end = self.sentence_offsets[end_sentence + 1]
+        return bytes(self.text[start:end]).decode("utf-8").rstrip()
+
+    def line_span(self, first_line: int, last_line: int) -> str:
+        """Materialize the text of an inclusive line range."""
+        if self.line_offsets is None:
+            raise ValueError("This transcript index has no line offsets")
+        start = self.line_offsets[first_line]
+        end = self.line_offsets[last_line + 1]
+        return bytes(self.text[start:end]).decode("utf-8").rstrip()
+
+    def chunk_text(self, chunk_id: int) -> str:
+        return self.sentence_span(*self.chunks[chunk_id])
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Yield chunk records with their text materialized one at a time."""
+        for chunk_id, (start_sentence, end_sentence) in enumerate(self.chunks):
+            yield {
+                "chunk_id": chunk_id,
+                "start_sentence": start_sentence,
+                "end_sentence": end_sentence,
+                "text": self.sentence_span(start_sentence, end_sentence),
+            }
+
+    def similarities(self, query_embedding: Any) -> np.ndarray:
+        """Cosine similarity between the query and every chunk. Needs the chunk embeddings."""
+        if self.embeddings is None:
+            raise ValueError("This transcript index has no chunk embeddings")
+        if not len(self.embeddings):
+            return np.empty(0, dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        return self.embeddings @ query
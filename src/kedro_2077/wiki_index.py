@@ -0,0 +1,56 @@
+"""Embedding index over the wiki pages.
+
+Titles, page text and embeddings are kept in flat, appendable structures: a
+list of titles, one UTF-8 text buffer with the end offset of every page, and
+a float32 matrix with one L2-normalized embedding per row. Scoring a query
+against every page is a single matrix-vector product, and page text is only
+decoded for the pages that make it into the results.
+"""
+from __future__ import annotations
+
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+
+
+class WikiIndex:
+    """
+    Wiki pages with their embeddings.
+
+    Args:
+        titles: Page titles, in row order.
+        text: All page texts concatenated, UTF-8 encoded. Any buffer works, e.g. ``bytes`` or an ``mmap``.
+        text_offsets: Byte offset where each page starts, followed by the buffer length.
+        embeddings: ``(pages, dim)`` float32 matrix of L2-normalized embeddings.
+    """
+
+    def __init__(self, titles: List[str], text: Any, text_offsets: Sequence[int], embeddings: np.ndarray):
+        self.titles = titles
+        self.text = text
+        self.text_offsets = text_offsets
+        self.embeddings = embeddings
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def page_text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self.text[start:end]).decode("utf-8")
+
+    def similarities(self, query_embedding: Any) -> np.ndarray:
+        """Cosine similarity between the query and every page."""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        return self.embeddings @ query
+
+    def top_k(self, query_embedding: Any, k: int) -> List[Tuple[int, float]]:
+        """Return the ``(row, similarity)`` pairs of the ``k`` most similar pages, best first."""
+        if k <= 0 or len(self) == 0:
+            return []
+        scores = self.similarities(query_embedding)
+        k = min(k, len(scores))
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.argsort(-scores[rows])]
+        return [(int(row), float(scores[row])) for row in rows]
@@ -0,0 +1,24 @@
+"""
+Fixtures shared by the test modules.
+"""
+import time
+
+import pytest
+
+
+class FakeClock:
+    """Stands in for ``time.time`` and ``time.monotonic``, moved forward by hand."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
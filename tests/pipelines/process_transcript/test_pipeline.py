@@ -7,3 +7,147 @@ Kedro recommends using `pytest` framework, more info about it can be found
 in the official documentation:
 https://docs.pytest.org/en/latest/getting-started.html
 """
+import re
+from collections import Counter
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from kedro_2077.pipelines.process_transcript import nodes  # noqa: E402
+from kedro_2077.pipelines.process_transcript.nodes import embed_transcript_chunks, parse_transcript  # noqa: E402
+
+TRANSCRIPT = """
+
+[Night City. V wakes up.]
+
+V: Wake up. Samurai!
+Jackie: Hey, choom. You good?
+Jackie: Let's go... Dex is waiting.
+  Dexter DeShawn: Right on time.   Sit down.
+Jackie: Gracias.
+
+
+[They sit.] Dexter DeShawn: The job? Simple!
+T-Bug: Jacked in.
+Takemura: Ünïcödé ✓. Hm.
+"""
+
+
+def old_sentences(transcript):
+    """Sentence split of the former ``chunk_transcript`` node."""
+    cleaned_transcript = re.sub(r'\n+', '\n', transcript.strip())
+    return re.split(r'(?<=[.!?])\s+', cleaned_transcript)
+
+
+def old_chunks(transcript, chunk_size, overlap):
+    """Chunks of the former ``chunk_transcript`` node, as ``(start, end, text)``."""
+    sentences = old_sentences(transcript)
+    chunks = []
+    start_idx = 0
+    while start_idx < len(sentences):
+        end_idx = min(start_idx + chunk_size, len(sentences))
+        chunks.append((start_idx, end_idx - 1, ' '.join(sentences[start_idx:end_idx])))
+        start_idx = max(start_idx + chunk_size - overlap, start_idx + 1)
+    return chunks
+
+
+def old_line_counts(transcript):
+    """Speakers of the former ``extract_characters`` node, with their number of lines."""
+    counts = Counter()
+    for line in transcript.split('\n'):
+        match = re.match(r'^([A-Za-z\s]+):', line.strip())
+        if match and len(match.group(1).strip()) > 1:
+            counts[match.group(1).strip()] += 1
+    return counts
+
+
+def words(text):
+    return " ".join(text.split())
+
+
+@pytest.mark.parametrize("chunk_size, overlap", [(1, 0), (3, 1), (4, 4), (100, 20)])
+def test_chunks_match_the_former_chunking(chunk_size, overlap):
+    index, _, _ = parse_transcript(TRANSCRIPT, chunk_size, overlap)
+    expected = old_chunks(TRANSCRIPT, chunk_size, overlap)
+
+    assert index.chunks == [(start, end) for start, end, _ in expected]
+    # Sentences keep their original whitespace instead of being joined with spaces
+    assert [words(index.chunk_text(i)) for i in range(len(index))] == [words(text) for _, _, text in expected]
+
+
+def test_characters_match_the_former_extraction():
+    _, character_list, _ = parse_transcript(TRANSCRIPT)
+
+    assert character_list == dict(old_line_counts(TRANSCRIPT))
+    assert list(character_list) == ["Dexter DeShawn", "Jackie", "Takemura"]
+
+
+def test_consecutive_lines_merge_into_turns():
+    index, _, speaker_index = parse_transcript(TRANSCRIPT)
+
+    assert speaker_index == {
+        "Dexter DeShawn": [[4, 4]],
+        "Jackie": [[2, 3], [5, 5]],
+        "Takemura": [[8, 8]],
+    }
+    assert index.line_span(2, 3) == "Jackie: Hey, choom. You good?\nJackie: Let's go... Dex is waiting."
+    assert index.line_span(4, 4) == "Dexter DeShawn: Right on time.   Sit down."
+
+
+@pytest.mark.parametrize("line, speaker", [
+    ("Johnny Silverhand: Wake up.", "Johnny Silverhand"),
+    ("\t Judy:  Hey.", "Judy"),
+    ("Panam : Hey.", "Panam"),
+    ("V: Hey.", None),
+    ("T-Bug: Hey.", None),
+    ("Delamain 2: Hey.", None),
+    ("[Judy: Hey.]", None),
+    (": Hey.", None),
+])
+def test_speaker_at_line_start(line, speaker):
+    _, character_list, speaker_index = parse_transcript(f"Intro.\n{line}")
+
+    expected = {speaker: 1} if speaker else {}
+    assert character_list == expected == dict(old_line_counts(f"Intro.\n{line}"))
+    assert speaker_index == ({speaker: [[1, 1]]} if speaker else {})
+
+
+def test_empty_transcript():
+    index, character_list, speaker_index = parse_transcript("\n\n")
+
+    assert index.chunks == [(0, 0)]
+    assert index.chunk_text(0) == ""
+    assert character_list == speaker_index == {}
+
+
+class LengthModel:
+    """Embeds a text as ``[len(text), 1]``, normalized, and records the batches it was given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_sentence_embedding_dimension(self):
+        return 2
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        vectors = np.array([[len(text), 1] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_chunks_are_embedded_in_batches(monkeypatch):
+    model = LengthModel()
+    monkeypatch.setattr(nodes, "_model", model)
+    index, _, _ = parse_transcript(TRANSCRIPT, chunk_size=2, overlap=1)
+
+    embedded = embed_transcript_chunks(index, batch_size=4)
+
+    texts = [index.chunk_text(i) for i in range(len(index))]
+    assert [len(batch) for batch in model.batches] == [4, 4, 4, len(texts) - 12]
+    assert sum(model.batches, []) == texts
+    assert embedded.chunks == index.chunks and embedded.text is index.text
+    assert embedded.embeddings.dtype == np.float32
+    assert embedded.embeddings.shape == (len(index), 2)
+    np.testing.assert_allclose(embedded.embeddings, model.encode(texts))
@@ -7,3 +7,82 @@ Kedro recommends using `pytest` framework, more info about it can be found
 in the official documentation:
 https://docs.pytest.org/en/latest/getting-started.html
 """
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from kedro_2077.batching_encoder import BatchingEncoder  # noqa: E402
+from kedro_2077.pipelines.query_pipeline import nodes  # noqa: E402
+from kedro_2077.transcript_index import TranscriptIndex  # noqa: E402
+from kedro_2077.wiki_index import WikiIndex  # noqa: E402
+
+SENTENCES = [
+    "Jackie: Let's go, Dex is waiting. ",
+    "V: The heist at Konpeki Plaza. ",
+    "Judy: The braindance studio is ready. ",
+    "Jackie: Konpeki Plaza is Arasaka turf. ",
+    "Panam: The Aldecaldos camp is out in the Badlands. ",
+    "Johnny: Arasaka tower, one more time.",
+]
+
+
+class BagOfWords:
+    """Embeds texts as normalized bags of hashed words, and counts the texts it encoded."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.encoded += len(texts)
+        vectors = np.zeros((len(texts), 32), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(",", " ").replace(".", " ").split():
+                vectors[row, zlib.crc32(word.encode()) % 32] += 1
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = BagOfWords()
+    monkeypatch.setattr(nodes, "_model", model)
+    monkeypatch.setattr(nodes, "query_encoder", BatchingEncoder(model, window_ms=0))
+    return model
+
+
+def transcript_index(model, embedded):
+    text = "".join(SENTENCES).encode("utf-8")
+    starts, position = [], 0
+    for sentence in SENTENCES:
+        starts.append(position)
+        position += len(sentence.encode("utf-8"))
+    index = TranscriptIndex.from_text(text, starts, chunk_size=2, overlap=1)
+    if embedded:
+        index.embeddings = model.encode([index.chunk_text(i) for i in range(len(index))])
+    return index
+
+
+def empty_wiki():
+    return WikiIndex([], b"", [0], np.empty((0, 32), dtype=np.float32))
+
+
+@pytest.mark.parametrize("query", ["Tell me about Konpeki Plaza", "What did Jackie say about Arasaka?"])
+def test_precomputed_chunk_embeddings_match_encoding_every_chunk(model, query):
+    characters = {"Jackie": 2, "Judy": 1}
+    expected = nodes.find_relevant_contexts(
+        query, transcript_index(model, embedded=False), empty_wiki(), characters, max_chunks=2
+    )
+
+    index = transcript_index(model, embedded=True)
+    model.encoded = 0
+    contexts = nodes.find_relevant_contexts(query, index, empty_wiki(), characters, max_chunks=2)
+
+    assert [c["text"] for c in contexts] == [c["text"] for c in expected]
+    assert [c["similarity"] for c in contexts] == pytest.approx([c["similarity"] for c in expected])
+    # Only the query is encoded, chunks were embedded at build time
+    assert model.encoded == 1
@@ -0,0 +1,168 @@
+"""
+Tests for the semantic answer cache.
+"""
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from kedro_2077 import answer_cache as answer_cache_module
+from kedro_2077.answer_cache import SemanticAnswerCache, context_fingerprint
+
+CONTEXTS = [{"source": "wiki", "text": "Johnny Silverhand: a rockerboy."}]
+FINGERPRINT = context_fingerprint(CONTEXTS)
+
+
+def make_cache(tmp_path, **kwargs):
+    return SemanticAnswerCache(path=str(tmp_path / "cache.sqlite"), **kwargs)
+
+
+def count_rows(cache, table):
+    """Rows written to the database, as another process would see them."""
+    with sqlite3.connect(str(cache.path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_similar_query_hits_and_dissimilar_misses(tmp_path):
+    cache = make_cache(tmp_path, similarity_threshold=0.9)
+    cache.store("Who is Johnny?", vector(1, 0, 0), FINGERPRINT, "v1", "A rockerboy.")
+
+    assert cache.lookup(vector(1, 0.1, 0), FINGERPRINT, "v1") == "A rockerboy."
+    assert cache.lookup(vector(1, 1, 0), FINGERPRINT, "v1") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_different_contexts_miss_unless_fingerprint_is_ignored(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "A rockerboy.")
+    other = context_fingerprint([{"source": "transcript", "text": "Johnny: Wake up, samurai."}])
+
+    assert cache.lookup(vector(1, 0), other, "v1") is None
+    assert cache.lookup(vector(1, 0), None, "v1") == "A rockerboy."
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "A rockerboy.")
+
+    clock.now += 59
+    assert cache.lookup(vector(1, 0), FINGERPRINT, "v1") == "A rockerboy."
+    clock.now += 2
+    assert cache.lookup(vector(1, 0), FINGERPRINT, "v1") is None
+    assert cache.stats()["entries"] == 0
+
+    # Expired entries are skipped by lookups and deleted by a later write
+    assert count_rows(cache, "entries") == 1
+    clock.now += answer_cache_module.EXPIRE_INTERVAL_SECONDS
+    cache.store("Who is Judy?", vector(0, 1), FINGERPRINT, "v1", "A braindance editor.")
+    assert count_rows(cache, "entries") == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.store("Who is Johnny?", vector(1, 0, 0), FINGERPRINT, "v1", "Johnny")
+    clock.now += 1
+    cache.store("Who is Judy?", vector(0, 1, 0), FINGERPRINT, "v1", "Judy")
+    clock.now += 1
+    # Using Johnny's entry makes Judy's the least recently used one
+    assert cache.lookup(vector(1, 0, 0), FINGERPRINT, "v1") == "Johnny"
+    clock.now += 1
+    cache.store("Who is Jackie?", vector(0, 0, 1), FINGERPRINT, "v1", "Jackie")
+
+    assert cache.lookup(vector(0, 1, 0), FINGERPRINT, "v1") is None
+    assert cache.lookup(vector(1, 0, 0), FINGERPRINT, "v1") == "Johnny"
+    assert cache.lookup(vector(0, 0, 1), FINGERPRINT, "v1") == "Jackie"
+
+
+def test_invalidate_drops_other_index_versions(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "Old answer")
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v2", "New answer")
+
+    assert cache.invalidate("v2") == 1
+    assert cache.lookup(vector(1, 0), FINGERPRINT, "v1") is None
+    assert cache.lookup(vector(1, 0), FINGERPRINT, "v2") == "New answer"
+
+
+def test_invalidate_only_deletes_when_the_active_version_changes(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "Old answer")
+    assert cache.invalidate("v1") == 0
+
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v2", "New answer")
+    # Still v1 active, nothing to check again
+    assert cache.invalidate("v1") == 0
+    assert count_rows(cache, "entries") == 2
+    assert cache.invalidate("v2") == 1
+
+
+def test_lookups_only_read_until_the_flush(tmp_path, clock):
+    cache = make_cache(tmp_path, flush_interval=10)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "A rockerboy.")
+
+    for _ in range(3):
+        assert cache.lookup(vector(1, 0), FINGERPRINT, "v1") == "A rockerboy."
+    assert cache.lookup(vector(0, 1), FINGERPRINT, "v1") is None
+
+    assert count_rows(cache, "stats") == 0
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+    clock.now += 10
+    cache.lookup(vector(1, 0), FINGERPRINT, "v1")
+    with sqlite3.connect(str(cache.path)) as conn:
+        assert dict(conn.execute("SELECT name, value FROM stats")) == {"hits": 4, "misses": 1}
+        assert conn.execute("SELECT hits, last_used_at FROM entries").fetchone() == (4, clock.now)
+
+
+def test_counters_add_up_over_processes(tmp_path):
+    first, second = make_cache(tmp_path), make_cache(tmp_path)
+    first.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "A rockerboy.")
+
+    first.lookup(vector(1, 0), FINGERPRINT, "v1")
+    second.lookup(vector(1, 0), FINGERPRINT, "v1")
+    first.flush()
+    second.flush()
+
+    assert first.stats()["hits"] == second.stats()["hits"] == 2
+
+
+def test_database_runs_in_wal_mode(tmp_path):
+    cache = make_cache(tmp_path)
+    assert not cache.path.exists()
+
+    cache.stats()
+    with sqlite3.connect(str(cache.path)) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_process_opens_its_own_connection(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.store("Who is Johnny?", vector(1, 0), FINGERPRINT, "v1", "A rockerboy.")
+    cache.lookup(vector(1, 0), FINGERPRINT, "v1")
+
+    pid = os.fork()
+    if not pid:
+        status = 1
+        try:
+            assert cache.lookup(vector(1, 0), FINGERPRINT, "v1") == "A rockerboy."
+            cache.store("Who is Judy?", vector(0, 1), FINGERPRINT, "v1", "A braindance editor.")
+            cache.flush()
+            status = 0
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+    assert cache.lookup(vector(0, 1), FINGERPRINT, "v1") == "A braindance editor."
+    cache.flush()
+    # The parent's pending hit was written once, by the parent
+    with sqlite3.connect(str(cache.path)) as conn:
+        assert dict(conn.execute("SELECT name, value FROM stats")) == {"hits": 3}
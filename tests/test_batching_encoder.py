@@ -0,0 +1,124 @@
+"""
+Tests for micro-batching of query encoding across threads.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from kedro_2077.batching_encoder import BatchingEncoder
+
+
+class RecordingModel:
+    """Encodes a text as ``[len(text), index]`` and records the batches it was given."""
+
+    def __init__(self, delay=0.0, error=None, gate=None):
+        self.delay = delay
+        self.error = error
+        self.gate = gate
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return np.array([[len(text), int(text.split()[-1])] for text in texts], dtype=np.float32)
+
+
+def submit_all(encoder, texts):
+    """Queue every text before the worker can start encoding, as concurrent queries would."""
+    return [encoder.submit(text) for text in texts]
+
+
+def test_results_come_back_in_request_order():
+    model = RecordingModel()
+    encoder = BatchingEncoder(model, window_ms=100, max_batch_size=8, normalize_embeddings=False)
+    texts = [f"{'word ' * n}{n}" for n in range(8)]
+
+    futures = submit_all(encoder, texts)
+
+    for text, future in zip(texts, futures):
+        assert future.result(timeout=5).tolist() == [len(text), int(text.split()[-1])]
+    assert model.batches == [texts]
+    assert encoder.stats["max_batch"] == 8
+
+
+def test_results_reach_concurrent_callers():
+    model = RecordingModel(delay=0.01)
+    encoder = BatchingEncoder(model, window_ms=20, max_batch_size=4, normalize_embeddings=False)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        vectors = list(pool.map(lambda n: encoder.encode(f"query {n}", timeout=5), range(10)))
+
+    assert [int(vector[1]) for vector in vectors] == list(range(10))
+    assert all(len(batch) <= 4 for batch in model.batches)
+    assert sum(len(batch) for batch in model.batches) == 10
+
+
+def test_window_flushes_a_partial_batch():
+    model = RecordingModel()
+    encoder = BatchingEncoder(model, window_ms=50, max_batch_size=32)
+
+    start = time.monotonic()
+    futures = submit_all(encoder, ["a 1", "b 2"])
+    for future in futures:
+        future.result(timeout=5)
+
+    # Encoded once the window ended, without waiting for a full batch
+    assert 0.04 <= time.monotonic() - start < 2
+    assert model.batches == [["a 1", "b 2"]]
+
+
+def test_full_batch_starts_before_the_window_ends():
+    model = RecordingModel()
+    encoder = BatchingEncoder(model, window_ms=2000, max_batch_size=3)
+
+    start = time.monotonic()
+    for future in submit_all(encoder, ["a 1", "b 2", "c 3"]):
+        future.result(timeout=5)
+
+    assert time.monotonic() - start < 1
+    assert model.batches == [["a 1", "b 2", "c 3"]]
+
+
+def test_errors_reach_every_waiter():
+    error = RuntimeError("CUDA out of memory")
+    encoder = BatchingEncoder(RecordingModel(error=error), window_ms=50, max_batch_size=8)
+
+    futures = submit_all(encoder, ["a 1", "b 2", "c 3"])
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(timeout=5)
+
+
+def test_encoder_keeps_working_after_an_error():
+    model = RecordingModel(error=RuntimeError("transient"))
+    encoder = BatchingEncoder(model, window_ms=1, normalize_embeddings=False)
+    with pytest.raises(RuntimeError):
+        encoder.encode("a 1", timeout=5)
+
+    model.error = None
+    assert encoder.encode("b 2", timeout=5).tolist() == [3, 2]
+
+
+def test_cancelled_requests_are_not_encoded():
+    # The worker is held on the first batch, so the next requests stay queued
+    gate = threading.Event()
+    model = RecordingModel(gate=gate)
+    encoder = BatchingEncoder(model, window_ms=100, max_batch_size=8)
+
+    first = encoder.submit("a 1")
+    time.sleep(0.15)
+    cancelled, kept = encoder.submit("b 2"), encoder.submit("c 3")
+    assert cancelled.cancel()
+    gate.set()
+
+    first.result(timeout=5)
+    kept.result(timeout=5)
+    assert model.batches == [["a 1"], ["c 3"]]
@@ -0,0 +1,81 @@
+"""
+Tests for the per-query latency budget and its degradation ladder, on a fake clock.
+"""
+import json
+import math
+
+from kedro_2077.deadline import (
+    CACHED_ANSWER, FEWER_CONTEXTS, FULL, RETRIEVAL_ONLY, SMALLER_PROMPT, Deadline, log_degradation,
+)
+
+
+def make_deadline(**kwargs):
+    return Deadline(seconds=30, fewer_contexts_below=20, smaller_prompt_below=12, min_llm_seconds=4, **kwargs)
+
+
+def test_budget_counts_from_arrival(clock):
+    deadline = make_deadline(started_at=clock.now - 5)
+
+    assert deadline.elapsed() == 5
+    assert deadline.remaining() == 25
+    assert deadline.timeout() == 25
+
+    clock.now += 40
+    assert deadline.remaining() == 0
+
+
+def test_ladder_thresholds(clock):
+    deadline = make_deadline()
+    rungs = lambda: [
+        deadline.below(threshold)
+        for threshold in (deadline.fewer_contexts_below, deadline.smaller_prompt_below, deadline.min_llm_seconds)
+    ]
+
+    assert rungs() == [False, False, False]
+    clock.now += 15
+    assert rungs() == [True, False, False]
+    clock.now += 5
+    assert rungs() == [True, True, False]
+    clock.now += 7
+    assert rungs() == [True, True, True]
+
+
+def test_degrade_keeps_the_deepest_level_and_every_step(clock):
+    deadline = make_deadline()
+    assert deadline.level == FULL
+
+    clock.now += 12
+    deadline.degrade(FEWER_CONTEXTS, "kept 1 of 2 contexts")
+    clock.now += 10
+    deadline.degrade(CACHED_ANSWER, "LLM call timed out")
+    deadline.degrade(SMALLER_PROMPT, "contexts truncated")
+
+    summary = deadline.summary()
+    assert deadline.level == CACHED_ANSWER
+    assert summary["level_name"] == "cached_answer"
+    assert summary["elapsed"] == 22
+    assert [step["level"] for step in summary["steps"]] == ["fewer_contexts", "cached_answer", "smaller_prompt"]
+    assert [step["elapsed"] for step in summary["steps"]] == [12, 22, 22]
+
+
+def test_no_budget_never_degrades(clock):
+    deadline = Deadline(seconds=None)
+    clock.now += 3600
+
+    assert deadline.remaining() == math.inf
+    assert deadline.timeout() is None
+    assert not deadline.below(deadline.fewer_contexts_below)
+
+
+def test_log_degradation_appends_jsonl(tmp_path, clock):
+    path = tmp_path / "logs" / "degradation.jsonl"
+    deadline = make_deadline()
+    log_degradation("Who is Johnny?", deadline, path)
+    deadline.degrade(RETRIEVAL_ONLY, "no cached answer to a similar question")
+    log_degradation("Who is Judy?", deadline, path)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["query"], r["level_name"]) for r in records] == [
+        ("Who is Johnny?", "full"),
+        ("Who is Judy?", "retrieval_only"),
+    ]
@@ -0,0 +1,85 @@
+"""
+Tests for MinHash/LSH near-duplicate detection.
+"""
+import random
+
+import pytest
+
+from kedro_2077.dedup import MinHashDeduplicator, lsh_params, shingle_hashes
+
+WORDS = (
+    "night city arasaka militech corpo street nomad netrunner braindance relic chip johnny "
+    "silverhand jackie welles judy alvarez panam palmer vik vektor dexter deshawn evelyn "
+    "parker afterlife badlands watson pacifica heywood santo domingo westbrook maelstrom"
+).split()
+
+
+def text(seed, length=120):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def edit(original, changes, seed=0):
+    """Replace ``changes`` words of ``original`` with random ones."""
+    rng = random.Random(seed)
+    words = original.split()
+    for position in rng.sample(range(len(words)), changes):
+        words[position] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def test_near_duplicate_maps_to_first_entry():
+    dedup = MinHashDeduplicator(threshold=0.8)
+    original = text(1)
+
+    assert dedup.add("original", original) is None
+    assert dedup.add("copy", edit(original, 2)) == "original"
+    assert dedup.add("exact", original) == "original"
+    assert dedup.duplicates == {"copy": "original", "exact": "original"}
+
+
+def test_unrelated_and_heavily_edited_texts_are_kept():
+    dedup = MinHashDeduplicator(threshold=0.8)
+    original = text(1)
+
+    assert dedup.add("original", original) is None
+    assert dedup.add("other", text(2)) is None
+    assert dedup.add("rewritten", edit(original, 60, seed=3)) is None
+    assert dedup.duplicates == {}
+
+
+def test_texts_without_words_are_never_duplicates():
+    dedup = MinHashDeduplicator()
+
+    assert dedup.add("a", "") is None
+    assert dedup.add("b", "  ... ") is None
+    assert len(shingle_hashes("")) == 0
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert list(shingle_hashes("Wake up, Samurai!", 2)) == list(shingle_hashes("wake up samurai", 2))
+    assert len(shingle_hashes("too short", 5)) == 1
+
+
+def test_add_all_is_reproducible():
+    entries = [(i, text(i % 5) if i < 10 else edit(text(i % 5), 1, seed=i)) for i in range(20)]
+
+    first = MinHashDeduplicator(seed=7).add_all(entries)
+    second = MinHashDeduplicator(seed=7).add_all(entries)
+
+    assert first == second
+    assert set(first.values()) <= {0, 1, 2, 3, 4}
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.7, 0.85, 0.95])
+def test_lsh_params_fit_the_signature(threshold):
+    bands, rows = lsh_params(threshold, 128)
+
+    assert bands * rows <= 128
+    midpoint = (1 - 0.5 ** (1 / bands)) ** (1 / rows)
+    assert abs(midpoint - threshold) < 0.1
+
+
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        MinHashDeduplicator(threshold=0)
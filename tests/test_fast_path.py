@@ -0,0 +1,60 @@
+"""
+Tests for the extractive entity lookup fast path.
+"""
+import pytest
+
+from kedro_2077.fast_path import EntityLookup, asked_entity
+
+# Transcript speakers go by their first name
+CHARACTERS = {"Jackie": 120, "Johnny": 300}
+
+
+def wiki(title, similarity, text=None):
+    text = text or f"{title}: {title} is a character. They live in Night City. More text follows"
+    return {"source": "wiki", "title": title, "text": text, "similarity": similarity}
+
+
+def transcript(similarity):
+    return {"source": "transcript", "text": "Jackie: Choom!", "similarity": similarity}
+
+
+@pytest.mark.parametrize("query, entity", [
+    ("Who is Jackie?", "Jackie"),
+    ("what's the Relic", "Relic"),
+    ("What is an Aldecaldo?", "Aldecaldo"),
+    ("How do I get the Relic?", None),
+])
+def test_asked_entity(query, entity):
+    assert asked_entity(query) == entity
+
+
+def test_confident_lookup_answers_from_the_wiki_page():
+    lookup = EntityLookup(min_margin=0.1, min_similarity=0.3, max_sentences=2)
+    contexts = [wiki("Jackie Welles", 0.8), transcript(0.5)]
+
+    answer = lookup.answer("Who is Jackie?", contexts, CHARACTERS)
+
+    assert answer == "**Jackie Welles**: Jackie Welles is a character. They live in Night City."
+    assert lookup.stats() == {"lookups": 1, "hits": 1, "hit_rate": 1.0}
+
+
+@pytest.mark.parametrize("query, contexts", [
+    ("Tell me about Jackie", [wiki("Jackie Welles", 0.8), transcript(0.5)]),
+    ("Who is Jackie?", [transcript(0.8), wiki("Jackie Welles", 0.5)]),
+    ("Who is Jackie?", [wiki("Jackie Welles", 0.2), transcript(0.1)]),
+    ("Who is Jackie?", [wiki("Jackie Welles", 0.8), transcript(0.75)]),
+    ("Who is Judy?", [wiki("Jackie Welles", 0.8), transcript(0.5)]),
+])
+def test_unconfident_lookups_fall_back_to_the_llm(query, contexts):
+    lookup = EntityLookup()
+
+    assert lookup.answer(query, contexts, CHARACTERS) is None
+    assert lookup.stats()["hits"] == 0
+
+
+def test_single_context_has_no_margin_to_trust(caplog):
+    lookup = EntityLookup()
+
+    with caplog.at_level("INFO"):
+        assert lookup.answer("Who is Jackie?", [wiki("Jackie Welles", 0.9)], CHARACTERS) is None
+    assert "no runner-up" in caplog.text
@@ -0,0 +1,123 @@
+"""
+Tests for the project hooks, driven the way Kedro's runner calls them.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from kedro.io import DataCatalog, MemoryDataset
+from kedro.pipeline import Pipeline, node
+
+from kedro_2077 import index_store
+from kedro_2077.hooks import IndexStagingHooks, NodeProfilingHooks, ProgressHooks
+
+
+def identity(x):
+    return x
+
+
+def stream(x):
+    yield from x
+
+
+PIPELINE = Pipeline([
+    node(identity, "a", "b", name="plain"),
+    node(stream, "b", "c", name="generator"),
+])
+
+
+def start(hooks, events):
+    hooks.watch("run", lambda done, total, name: events.append((done, total, name)))
+    hooks.before_pipeline_run(run_params={"session_id": "run"}, pipeline=PIPELINE)
+
+
+def test_progress_reports_plain_nodes_right_away():
+    hooks, events = ProgressHooks(), []
+    start(hooks, events)
+
+    hooks.after_node_run(node=PIPELINE.nodes[0], run_id="run", outputs={"b": [1, 2]})
+
+    assert events == [(1, 2, "plain")]
+
+
+def test_progress_reports_generator_nodes_once_their_stream_is_saved():
+    hooks, events = ProgressHooks(), []
+    start(hooks, events)
+    outputs = {"c": stream([1, 2])}
+
+    hooks.after_node_run(node=PIPELINE.nodes[1], run_id="run", outputs=outputs)
+    assert events == []
+
+    saved = []
+    for chunk in outputs["c"]:
+        saved.append(chunk)
+        assert events == []
+    assert saved == [1, 2]
+    assert events == [(1, 2, "generator")]
+
+
+def test_progress_skips_failed_generator_nodes():
+    def failing():
+        yield 1
+        raise RuntimeError("embedding failed")
+
+    hooks, events = ProgressHooks(), []
+    start(hooks, events)
+    outputs = {"c": failing()}
+    hooks.after_node_run(node=PIPELINE.nodes[1], run_id="run", outputs=outputs)
+
+    with pytest.raises(RuntimeError):
+        list(outputs["c"])
+    assert events == []
+
+
+def test_profiling_covers_a_generator_node_until_its_stream_ends(tmp_path):
+    def slow_stream():
+        for chunk in range(3):
+            time.sleep(0.05)
+            yield chunk
+
+    hooks = NodeProfilingHooks()
+    params = {"profiling": {"enabled": True, "output_dir": str(tmp_path)}}
+    catalog = DataCatalog(datasets={"parameters": MemoryDataset(params)})
+    generator = PIPELINE.nodes[1]
+    hooks.before_pipeline_run(run_params={"session_id": "run"}, catalog=catalog)
+    hooks.before_node_run(node=generator, run_id="run")
+    outputs = {"c": slow_stream()}
+
+    hooks.after_node_run(node=generator, run_id="run", outputs=outputs)
+    assert not (tmp_path / "run" / "generator.pstats").exists()
+
+    assert list(outputs["c"]) == [0, 1, 2]
+    hooks.after_pipeline_run(run_params={"session_id": "run"})
+
+    for suffix in ("pstats", "allocations.txt", "collapsed"):
+        assert (tmp_path / "run" / f"generator.{suffix}").exists()
+    summary = json.loads((tmp_path / "run" / "summary.json").read_text())
+    assert summary["generator"]["seconds"] >= 0.15
+
+
+def test_index_outputs_are_staged_in_the_project_from_another_directory(tmp_path, monkeypatch):
+    pytest.importorskip("kedro_datasets")
+    project, elsewhere = tmp_path / "project", tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    for name in ("PROCESSED_DIR", "VERSIONS_DIR", "POINTER_FILE"):
+        monkeypatch.setattr(index_store, name, getattr(index_store, name))
+    hooks = IndexStagingHooks()
+
+    hooks.after_context_created(context=SimpleNamespace(project_path=project))
+    # The catalog makes the active_index paths absolute against the project path
+    catalog = DataCatalog.from_config({
+        "character_list": {"type": "json.JSONDataset", "filepath": f"{index_store.active_dir()}/character_list.json"},
+    })
+    pipeline = Pipeline([node(identity, "a", "character_list", name="characters")])
+    run_params = {"session_id": "build", "runtime_params": {}}
+    hooks.before_pipeline_run(run_params=run_params, pipeline=pipeline, catalog=catalog)
+    catalog.save("character_list", {"Johnny": 300})
+    hooks.after_pipeline_run(run_params=run_params)
+
+    version = (project / "data" / "processed" / "CURRENT").read_text()
+    assert json.loads((index_store.version_dir(version) / "character_list.json").read_text()) == {"Johnny": 300}
+    assert list(elsewhere.iterdir()) == []
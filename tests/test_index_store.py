@@ -0,0 +1,106 @@
+"""
+Tests for versioned index storage: staging, activation and garbage collection.
+"""
+import os
+import time
+
+import pytest
+
+from kedro_2077 import index_store
+
+
+@pytest.fixture(autouse=True)
+def processed_dir(tmp_path, monkeypatch):
+    processed = tmp_path / "processed"
+    monkeypatch.setattr(index_store, "PROCESSED_DIR", processed)
+    monkeypatch.setattr(index_store, "VERSIONS_DIR", processed / "versions")
+    monkeypatch.setattr(index_store, "POINTER_FILE", processed / "CURRENT")
+    return processed
+
+
+def build(content="index"):
+    with index_store.staging() as (version, staging_dir):
+        with open(os.path.join(staging_dir, "index.txt"), "w") as f:
+            f.write(content)
+    return version
+
+
+def test_staging_activates_complete_build():
+    version = build()
+
+    assert index_store.active_version() == version
+    assert index_store.list_versions() == [version]
+    with open(os.path.join(index_store.active_dir(), "index.txt")) as f:
+        assert f.read() == "index"
+
+
+def test_failed_build_is_removed_and_active_version_kept():
+    version = build()
+
+    with pytest.raises(RuntimeError):
+        with index_store.staging() as (_, staging_dir):
+            with open(os.path.join(staging_dir, "index.txt"), "w") as f:
+                f.write("half written")
+            raise RuntimeError("build failed")
+
+    assert not os.path.exists(staging_dir)
+    assert index_store.active_version() == version
+    assert os.listdir(index_store.VERSIONS_DIR) == [version]
+
+
+def test_pinned_version_survives_new_builds(monkeypatch):
+    monkeypatch.setattr(index_store, "DEACTIVATED_GRACE_SECONDS", 0)
+    old = build("old")
+
+    with index_store.pinned() as index_dir:
+        new = build("new")
+        build("newer")
+        assert os.path.isdir(index_dir)
+        assert old in index_store.list_versions()
+    assert new not in index_store.list_versions()
+
+    # Unpinning collects it
+    assert old not in index_store.list_versions()
+
+
+def test_other_processes_staging_dirs_are_kept_until_stale():
+    build()
+    running = index_store.VERSIONS_DIR / f"{index_store.new_version()}{index_store.STAGING_SUFFIX}"
+    abandoned = index_store.VERSIONS_DIR / f"{index_store.new_version()}{index_store.STAGING_SUFFIX}"
+    running.mkdir()
+    abandoned.mkdir()
+    stale = time.time() - index_store.STALE_STAGING_SECONDS - 60
+    os.utime(abandoned, (stale, stale))
+
+    removed = index_store.collect_garbage()
+
+    assert removed == [abandoned.name]
+    assert running.is_dir()
+
+
+def test_replaced_versions_are_kept_for_the_grace_period():
+    old = build("old")
+    new = build("new")
+
+    # Another process may still be reading the version it pinned before the switch
+    assert index_store.list_versions() == [old, new]
+
+    expired = time.time() - index_store.DEACTIVATED_GRACE_SECONDS - 60
+    os.utime(index_store.version_dir(old), (expired, expired))
+    assert index_store.collect_garbage() == [old]
+    assert index_store.list_versions() == [new]
+
+
+def test_paths_are_anchored_to_the_project(tmp_path, monkeypatch):
+    project, elsewhere = tmp_path / "project", tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    index_store.set_project_path(project)
+
+    version = build()
+
+    processed = project / "data" / "processed"
+    assert (processed / "CURRENT").read_text() == version
+    assert index_store.active_dir() == str(processed / "versions" / version)
+    assert index_store.version_of(index_store.active_dir()) == version
+    assert list(elsewhere.iterdir()) == []
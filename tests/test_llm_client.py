@@ -0,0 +1,207 @@
+"""
+Tests for the resilient LLM client layer, run against a local stub server
+that injects latency and failures.
+"""
+import json
+import time
+import urllib.request
+
+import pytest
+
+from kedro_2077.llm_client import LLMTimeoutError, ResilientLLM
+from kedro_2077.stub_llm import StubLLMServer
+
+
+class HTTPChat:
+    """Minimal chat client speaking the OpenAI wire format to the stub."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def invoke(self, messages, timeout=10):
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions",
+            data=json.dumps({"model": "stub", "messages": messages}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)["choices"][0]["message"]["content"]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FailingLLM:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        raise StatusError(self.status_code)
+
+
+class SlowLLM:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        time.sleep(self.latency)
+        return "done"
+
+
+class BrokenLLM:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        raise self.error
+
+
+MESSAGES = [{"role": "user", "content": "Who is Johnny Silverhand?"}]
+
+
+def test_retries_injected_failures():
+    with StubLLMServer(fail=lambda n: n < 2) as server:
+        llm = ResilientLLM(HTTPChat(server.url), max_retries=3, backoff_base=0.01)
+
+        assert llm.invoke(MESSAGES) == server.reply
+        assert server.requests == 3
+        assert llm.stats["retries"] == 2
+
+
+def test_gives_up_after_max_retries():
+    with StubLLMServer(fail=lambda n: True) as server:
+        llm = ResilientLLM(HTTPChat(server.url), max_retries=2, backoff_base=0.01)
+
+        with pytest.raises(Exception):
+            llm.invoke(MESSAGES)
+        assert server.requests == 3
+
+
+def test_client_errors_are_not_retried():
+    failing = FailingLLM(status_code=401)
+    llm = ResilientLLM(failing, max_retries=3, backoff_base=0.01)
+
+    with pytest.raises(StatusError):
+        llm.invoke(MESSAGES)
+    assert failing.calls == 1
+
+
+def test_programming_errors_are_not_retried():
+    broken = BrokenLLM(TypeError("unexpected keyword argument"))
+    llm = ResilientLLM(broken, max_retries=3, backoff_base=0.01)
+
+    with pytest.raises(TypeError):
+        llm.invoke(MESSAGES)
+    assert broken.calls == 1
+
+
+def test_connection_errors_are_retried():
+    broken = BrokenLLM(ConnectionResetError("connection reset by peer"))
+    llm = ResilientLLM(broken, max_retries=2, backoff_base=0.01)
+
+    with pytest.raises(ConnectionResetError):
+        llm.invoke(MESSAGES)
+    assert broken.calls == 3
+
+
+def test_hedged_request_cuts_tail_latency():
+    # The first request hits a 2s stall, the hedge fired after 0.1s answers at once
+    with StubLLMServer(latency=lambda n: 2.0 if n == 0 else 0.0) as server:
+        llm = ResilientLLM(HTTPChat(server.url), hedge=True, hedge_after=0.1)
+
+        start = time.monotonic()
+        assert llm.invoke(MESSAGES) == server.reply
+        assert time.monotonic() - start < 1.0
+        assert llm.stats["hedges"] == 1
+        assert llm.stats["hedge_wins"] == 1
+
+
+def test_hedge_delay_follows_observed_p95():
+    with StubLLMServer(latency=lambda n: 0.01) as server:
+        llm = ResilientLLM(HTTPChat(server.url), hedge=True, hedge_after=5.0, min_samples=5)
+        assert llm.hedge_delay() == 5.0
+
+        for _ in range(5):
+            llm.invoke(MESSAGES)
+        assert llm.hedge_delay() < 1.0
+
+
+def test_deadline_is_enforced():
+    with StubLLMServer(latency=lambda n: 2.0) as server:
+        llm = ResilientLLM(HTTPChat(server.url))
+
+        start = time.monotonic()
+        with pytest.raises(LLMTimeoutError):
+            llm.invoke(MESSAGES, timeout=0.3)
+        assert time.monotonic() - start < 1.0
+        assert llm.stats["timeouts"] == 1
+
+
+@pytest.mark.parametrize("hedge", [False, True])
+def test_infinite_timeout_falls_back_to_default(hedge):
+    slow = SlowLLM(latency=0.05)
+    llm = ResilientLLM(slow, timeout=5, hedge=hedge, hedge_after=0.01)
+
+    assert llm.invoke(MESSAGES, timeout=float("inf")) == "done"
+
+
+def test_queued_requests_are_cancelled_at_the_deadline():
+    slow = SlowLLM(latency=0.5)
+    llm = ResilientLLM(slow, max_workers=1)
+
+    # The first call occupies the only worker, the second one stays queued behind it
+    for _ in range(2):
+        with pytest.raises(LLMTimeoutError):
+            llm.invoke(MESSAGES, timeout=0.1)
+    time.sleep(0.6)
+    assert slow.calls == 1
+
+
+class TimedLLM:
+    def __init__(self):
+        self.timeouts = []
+
+    def invoke(self, messages, timeout=None):
+        self.timeouts.append(timeout)
+        return "done"
+
+
+def test_request_timeout_is_cut_to_the_deadline():
+    timed = TimedLLM()
+    llm = ResilientLLM(timed, request_timeout=60)
+
+    llm.invoke(MESSAGES, timeout=2)
+    llm.invoke(MESSAGES, timeout=120)
+
+    assert 0 < timed.timeouts[0] <= 2
+    assert timed.timeouts[1] == 60
+
+
+def test_request_timeout_frees_the_worker_at_the_deadline():
+    with StubLLMServer(latency=lambda n: 2.0 if n == 0 else 0.0) as server:
+        llm = ResilientLLM(HTTPChat(server.url), max_workers=1, request_timeout=10)
+
+        with pytest.raises(LLMTimeoutError):
+            llm.invoke(MESSAGES, timeout=0.3)
+        # The stalled request was aborted, so the only worker can take the next one
+        assert llm.invoke(MESSAGES, timeout=1.0) == server.reply
+
+
+def test_build_llm_talks_to_stub():
+    pytest.importorskip("langchain_openai")
+    from kedro_2077.llm_client import build_llm
+
+    with StubLLMServer(fail=lambda n: n == 0) as server:
+        llm = build_llm(api_key="stub", base_url=server.url, backoff_base=0.01)
+
+        assert llm.invoke(MESSAGES).content == server.reply
+        assert server.requests == 2
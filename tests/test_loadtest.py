@@ -0,0 +1,93 @@
+"""
+Tests for the load-test harness, with the query pipeline replaced by a fake.
+"""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from kedro_2077 import loadtest
+from kedro_2077.loadtest import DEFAULT_QUERIES, LoadTest, degradation_levels, load_queries, percentile
+
+ENV = ("OPENAI_BASE_URL", "OPENAI_API_KEY", "KEDRO_2077_ANSWER_CACHE", "KEDRO_2077_ANSWER_CACHE_PATH",
+       "KEDRO_2077_FAST_PATH", "KEDRO_2077_DEGRADATION_LOG")
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1), (50, 5), (95, 10), (99, 10), (100, 10)])
+def test_percentile_nearest_rank(q, expected):
+    assert percentile(list(range(10, 0, -1)), q) == expected
+
+
+def test_percentile_of_nothing():
+    assert percentile([], 50) is None
+
+
+def test_load_queries(tmp_path):
+    query_log = tmp_path / "queries.jsonl"
+    query_log.write_text('{"query": "Who is V?"}\nWhere is Watson?\n\n', encoding="utf-8")
+
+    assert load_queries(query_log) == ["Who is V?", "Where is Watson?"]
+    assert load_queries(tmp_path / "missing.jsonl") == DEFAULT_QUERIES
+
+
+def test_load_test_counts_every_query(monkeypatch):
+    answered = []
+
+    def run_query(query, log=True):
+        assert not log
+        time.sleep(0.02)
+        if query == "fail":
+            raise RuntimeError("pipeline failed")
+        answered.append(query)
+        return "answer"
+
+    monkeypatch.setattr(loadtest, "run_query", run_query)
+    test = LoadTest(["a", "b", "fail"], rate=50, duration=0.19, poisson=False)
+
+    report = asyncio.run(test.run(sample_interval=0.05))
+
+    assert report["submitted"] == 10
+    assert report["completed"] == len(answered) == 7
+    assert report["errors"] == 3
+    assert answered[:2] == ["a", "b"]
+    assert 0.02 <= report["latency_s"]["p50"] <= report["latency_s"]["p99"] <= report["latency_s"]["max"]
+    assert report["timeline"] and report["timeline"][-1]["t"] >= report["timeline"][0]["t"]
+
+
+def test_main_keeps_the_bot_cache_fast_path_and_logs_out(tmp_path, monkeypatch):
+    for name in ENV:
+        monkeypatch.setenv(name, "")
+    seen = []
+
+    def run_query(query, log=True):
+        seen.append({name: os.environ[name] for name in ENV[2:]})
+        with open(os.environ["KEDRO_2077_DEGRADATION_LOG"], "a", encoding="utf-8") as f:
+            f.write(json.dumps({"query": query, "level_name": "full"}) + "\n")
+        return "answer"
+
+    monkeypatch.setattr(loadtest, "run_query", run_query)
+    degradation_log = tmp_path / "degradation.jsonl"
+    degradation_log.write_text(json.dumps({"query": "earlier run", "level_name": "retrieval_only"}) + "\n")
+
+    report = loadtest.main([
+        "--queries", str(tmp_path / "none.jsonl"), "--rate", "20", "--duration", "0.1", "--constant",
+        "--degradation-log", str(degradation_log), "--output", str(tmp_path / "report.json"),
+    ])
+
+    assert seen and all(env == seen[0] for env in seen)
+    assert seen[0]["KEDRO_2077_ANSWER_CACHE"] == "0"
+    assert seen[0]["KEDRO_2077_FAST_PATH"] == "0"
+    assert seen[0]["KEDRO_2077_DEGRADATION_LOG"] == str(degradation_log)
+    assert report["degradation_levels"] == {"full": report["completed"]}
+    assert json.loads((tmp_path / "report.json").read_text())["fast_path"] is False
+
+
+def test_degradation_levels_from_offset(tmp_path):
+    path = tmp_path / "degradation.jsonl"
+    path.write_text("".join(json.dumps({"level_name": level}) + "\n" for level in ["full", "cached_answer", "full"]))
+
+    assert degradation_levels(path) == {"full": 2, "cached_answer": 1}
+    assert degradation_levels(path, offset=len(json.dumps({"level_name": "full"})) + 1) == {"cached_answer": 1, "full": 1}
+    assert degradation_levels(tmp_path / "missing.jsonl") == {}
@@ -0,0 +1,139 @@
+"""
+Tests for the multi-worker query server, with the query pipeline replaced by small stand-ins.
+"""
+import os
+import signal
+import socket
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from kedro.framework.hooks import _create_hook_manager, hook_impl
+from kedro.pipeline import Node, Pipeline
+
+from kedro_2077 import server
+from kedro_2077.answer_cache import SemanticAnswerCache
+from kedro_2077.deadline import Deadline
+from kedro_2077.server import QueryApp, _OutputRecorder, remote_query
+
+QUERIES = {"Who is Johnny?": [1, 0], "Who is Judy?": [0, 1]}
+
+
+class CachedAnswers:
+    """Stands in for the query pipeline of a worker, answering from an answer cache."""
+
+    def __init__(self, cache, project_path):
+        self.cache = cache
+        self.project_path = project_path
+        self.params = {}
+        self.index = SimpleNamespace(get=lambda: None)
+
+    def answer(self, user_query, started_at=None):
+        answer = self.cache.lookup(np.array(QUERIES[user_query]), None, "v1")
+        if answer is None:
+            answer = f"Answered by worker {os.getpid()}."
+            self.cache.store(user_query, np.array(QUERIES[user_query]), "", "v1", answer)
+        return {"answer": answer, "pid": os.getpid()}
+
+    retrieve = answer
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_worker_answers_a_request(tmp_path, monkeypatch):
+    # The parent uses the cache before forking, so the worker inherits an open connection
+    cache = SemanticAnswerCache(path=str(tmp_path / "cache.sqlite"))
+    cache.store("Who is Johnny?", np.array([1, 0]), "", "v1", "A rockerboy.")
+    monkeypatch.setattr(server, "QueryApp", lambda project_path: CachedAnswers(cache, project_path))
+
+    sock = socket.create_server(("127.0.0.1", 0))
+    url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    pid = server._spawn(sock, tmp_path)
+    try:
+        johnny = remote_query(url, "Who is Johnny?", timeout=10)
+        judy = remote_query(url, "Who is Judy?", timeout=10)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+        sock.close()
+
+    assert johnny == {"answer": "A rockerboy.", "pid": pid}
+    assert judy == {"answer": f"Answered by worker {pid}.", "pid": pid}
+    # Written through the worker's own connection
+    assert cache.lookup(np.array([0, 1]), None, "v1") == judy["answer"]
+
+
+class RecordingHooks:
+    def __init__(self):
+        self.calls = []
+
+    @hook_impl
+    def before_pipeline_run(self, run_params, pipeline, catalog):
+        self.calls.append(("before_pipeline_run", run_params["session_id"], run_params["runtime_params"]["index_dir"]))
+
+    @hook_impl
+    def before_node_run(self, node, run_id):
+        self.calls.append(("before_node_run", run_id, node.name))
+
+    @hook_impl
+    def after_pipeline_run(self, run_params):
+        self.calls.append(("after_pipeline_run", run_params["session_id"]))
+
+    @hook_impl
+    def on_pipeline_error(self, error, run_params):
+        self.calls.append(("on_pipeline_error", run_params["session_id"], str(error)))
+
+
+def make_app(hooks, retrieve):
+    """A query app running a two-node stand-in of the query pipeline."""
+    app = QueryApp.__new__(QueryApp)
+    app.project_path = server.PROJECT_PATH
+    app.params = {"max_chunks": 2}
+    app.prompt = "prompt"
+    app.index = SimpleNamespace(get=lambda: ("/index/v1", {"transcript_chunks": ["chunk 1", "chunk 2", "chunk 3"]}))
+    app.outputs = _OutputRecorder()
+    app.hook_manager = _create_hook_manager()
+    for hook in (hooks, app.outputs):
+        app.hook_manager.register(hook)
+
+    app.answering = Pipeline([
+        Node(retrieve, ["params:user_query", "transcript_chunks", "params:max_chunks"],
+             [server.CONTEXTS_OUTPUT, server.DEADLINE_OUTPUT], name="retrieve"),
+        Node(lambda contexts, prompt: f"{prompt}: {', '.join(contexts)}", [server.CONTEXTS_OUTPUT, "query_prompt"],
+             server.ANSWER_OUTPUT, name="answer"),
+    ])
+    return app
+
+
+def test_requests_run_with_the_project_hooks(clock):
+    hooks = RecordingHooks()
+    app = make_app(hooks, lambda query, chunks, max_chunks: (chunks[:max_chunks], Deadline(60)))
+
+    result = app.answer("Who is Johnny?")
+
+    assert result["answer"] == "prompt: chunk 1, chunk 2"
+    # Intermediate outputs are kept for the response although the runner released them
+    assert result["contexts"] == ["chunk 1", "chunk 2"]
+    assert result["degradation"] == Deadline(60).summary()
+
+    run_id = hooks.calls[0][1]
+    assert hooks.calls == [
+        ("before_pipeline_run", run_id, "/index/v1"),
+        ("before_node_run", run_id, "retrieve"),
+        ("before_node_run", run_id, "answer"),
+        ("after_pipeline_run", run_id),
+    ]
+    assert app.outputs._runs == {}
+
+
+def test_failed_requests_reach_the_error_hook():
+    def retrieve(query, chunks, max_chunks):
+        raise RuntimeError("index unavailable")
+
+    hooks = RecordingHooks()
+    app = make_app(hooks, retrieve)
+
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        app.answer("Who is Johnny?")
+
+    assert hooks.calls[-1] == ("on_pipeline_error", hooks.calls[0][1], "index unavailable")
+    assert app.outputs._runs == {}
@@ -0,0 +1,35 @@
+"""
+Tests for the query log written by the blocking entry points.
+"""
+from kedro_2077.serving import QUERY_LOG, log_query, parse_query_log
+
+
+def test_query_log_is_off_by_default(tmp_path):
+    log_query("Who is Johnny?", None, tmp_path)
+    log_query("Who is Johnny?", {"enabled": False}, tmp_path)
+
+    assert not (tmp_path / QUERY_LOG).exists()
+
+
+def test_query_log_is_written_in_the_project(tmp_path):
+    for query in ("Who is Johnny?", "Where is Watson?"):
+        log_query(query, {"enabled": True}, tmp_path)
+
+    path = tmp_path / QUERY_LOG
+    assert parse_query_log(path.read_text(encoding="utf-8")) == ["Who is Johnny?", "Where is Watson?"]
+
+
+def test_query_log_is_rotated(tmp_path):
+    settings = {"enabled": True, "max_bytes": 150, "backups": 2}
+    queries = [f"Question number {n}?" for n in range(8)]
+    for query in queries:
+        log_query(query, settings, tmp_path)
+
+    path = tmp_path / QUERY_LOG
+    files = [path.with_name(f"{path.name}.2"), path.with_name(f"{path.name}.1"), path]
+    assert all(f.stat().st_size <= 150 for f in files)
+    assert not path.with_name(f"{path.name}.3").exists()
+
+    logged = [query for f in files for query in parse_query_log(f.read_text(encoding="utf-8"))]
+    assert logged == queries[-len(logged):]
+    assert len(logged) < len(queries)
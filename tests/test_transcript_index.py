@@ -0,0 +1,143 @@
+"""
+Tests for the sentence-offset transcript index and its dataset.
+"""
+import numpy as np
+import pytest
+from kedro.io import DatasetError
+
+from kedro_2077.datasets.transcript_index_dataset import TranscriptIndexDataset
+from kedro_2077.transcript_index import TranscriptIndex, chunk_ranges
+
+TEXT = "V: Wake up, samurai. Ünïcödé ✓!\nJohnny: We have a city to burn.\nJackie: Choom?".encode("utf-8")
+
+
+def make_index(chunk_size=2, overlap=1):
+    sentence_starts = [0, TEXT.index(b"\xc3\x9c"), TEXT.index(b"Johnny"), TEXT.index(b"Jackie")]
+    line_starts = [0, TEXT.index(b"Johnny"), TEXT.index(b"Jackie")]
+    return TranscriptIndex.from_text(TEXT, sentence_starts, chunk_size, overlap, line_starts=line_starts)
+
+
+def with_embeddings(index):
+    """One L2-normalized row per chunk, chunk ``i`` pointing along axis ``i``."""
+    index.embeddings = np.eye(len(index), 8, dtype=np.float32)
+    return index
+
+
+@pytest.mark.parametrize("sentence_count, chunk_size, overlap, expected", [
+    (10, 4, 1, [(0, 3), (3, 6), (6, 9), (9, 9)]),
+    (3, 5, 2, [(0, 2)]),
+    (3, 2, 2, [(0, 1), (1, 2), (2, 2)]),
+    (0, 4, 1, []),
+])
+def test_chunk_ranges(sentence_count, chunk_size, overlap, expected):
+    assert chunk_ranges(sentence_count, chunk_size, overlap) == expected
+
+
+def test_spans_are_sliced_at_byte_offsets():
+    index = make_index()
+
+    assert index.sentence_count == 4
+    assert list(index.sentence_offsets)[-1] == len(TEXT)
+    assert index.sentence_span(0, 0) == "V: Wake up, samurai."
+    assert index.sentence_span(1, 1) == "Ünïcödé ✓!"
+    assert index.line_span(1, 2) == "Johnny: We have a city to burn.\nJackie: Choom?"
+
+
+def test_chunks_are_sentence_ranges():
+    index = make_index()
+
+    assert index.chunks == [(0, 1), (1, 2), (2, 3), (3, 3)]
+    assert index.chunk_text(1) == "Ünïcödé ✓!\nJohnny: We have a city to burn."
+    assert [chunk["text"] for chunk in index.iter_chunks()] == [index.chunk_text(i) for i in range(len(index))]
+
+
+def test_similarities_use_the_chunk_embeddings():
+    index = with_embeddings(make_index())
+
+    np.testing.assert_allclose(index.similarities([0, 3, 4, 0, 0, 0, 0, 0]), [0, 0.6, 0.8, 0])
+    with pytest.raises(ValueError):
+        make_index().similarities(np.ones(8))
+
+
+def test_line_span_needs_line_offsets():
+    index = TranscriptIndex.from_text(TEXT, [0])
+
+    with pytest.raises(ValueError):
+        index.line_span(0, 0)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_dataset_round_trip(tmp_path, mmap):
+    index = make_index()
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"), mmap=mmap)
+    assert not dataset.exists()
+
+    dataset.save(index)
+    loaded = dataset.load()
+
+    assert dataset.exists()
+    assert bytes(loaded.text) == TEXT
+    assert list(loaded.sentence_offsets) == list(index.sentence_offsets)
+    assert list(loaded.line_offsets) == list(index.line_offsets)
+    assert loaded.chunks == index.chunks
+    assert list(loaded.iter_chunks()) == list(index.iter_chunks())
+    assert loaded.embeddings is None
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_dataset_round_trip_with_embeddings(tmp_path, mmap):
+    index = with_embeddings(make_index())
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"), mmap=mmap)
+
+    dataset.save(index)
+    loaded = dataset.load()
+
+    assert isinstance(loaded.embeddings, np.memmap) == mmap
+    np.testing.assert_array_equal(loaded.embeddings, index.embeddings)
+    np.testing.assert_allclose(loaded.similarities(np.eye(8)[2]), [0, 0, 1, 0])
+
+
+def test_dataset_drops_stale_embeddings(tmp_path):
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"))
+    dataset.save(with_embeddings(make_index()))
+
+    dataset.save(make_index(chunk_size=1, overlap=0))
+
+    assert not (tmp_path / "transcript" / TranscriptIndexDataset.EMBEDDINGS_FILE).exists()
+    assert dataset.load().embeddings is None
+
+
+def test_dataset_needs_one_embedding_per_chunk(tmp_path):
+    index = make_index()
+    index.embeddings = np.zeros((len(index) + 1, 8), dtype=np.float32)
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"))
+
+    with pytest.raises(DatasetError):
+        dataset.save(index)
+
+    dataset.save(with_embeddings(make_index()))
+    (tmp_path / "transcript" / TranscriptIndexDataset.EMBEDDINGS_FILE).write_bytes(b"\0" * 20)
+    with pytest.raises(DatasetError):
+        dataset.load()
+
+
+def test_dataset_without_line_offsets(tmp_path):
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"))
+    dataset.save(TranscriptIndex.from_text(TEXT, [0]))
+
+    assert dataset.load().line_offsets is None
+
+
+def test_dataset_maps_an_empty_transcript(tmp_path):
+    dataset = TranscriptIndexDataset(path=str(tmp_path / "transcript"), mmap=True)
+    dataset.save(with_embeddings(TranscriptIndex.from_text(b"", [0])))
+
+    loaded = dataset.load()
+    assert loaded.text == b""
+    assert loaded.sentence_span(0, 0) == ""
+    assert loaded.similarities(np.eye(8)[0]).tolist() == [1]
+
+
+def test_dataset_missing_files(tmp_path):
+    with pytest.raises(DatasetError):
+        TranscriptIndexDataset(path=str(tmp_path / "missing")).load()
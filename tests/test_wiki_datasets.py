@@ -0,0 +1,108 @@
+"""
+Tests for streaming the wiki dump and for the appendable wiki index.
+"""
+import io
+import json
+
+import numpy as np
+import pytest
+from kedro.io import DatasetError
+
+from kedro_2077.datasets.wiki_index_dataset import WikiIndexDataset
+from kedro_2077.datasets.wiki_pages_dataset import WikiPagesDataset, _JSONObjectStream
+
+PAGES = {
+    "Johnny Silverhand": "Rockerboy, \"legendary\" and dead.\nSee also: Samurai.",
+    "Night City": "A megacity in the Free State of Northern California. Ünïcödé ✓",
+    "Relic": "",
+    "Numbers": 12345,
+    "Nested": {"a": [1, 2, {"b": None}], "c": True},
+}
+
+
+def stream(text, read_size):
+    return list(_JSONObjectStream(io.StringIO(text), read_size, "test.json"))
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64])
+def test_json_object_stream_with_tiny_reads(read_size):
+    text = json.dumps(PAGES, indent=2, ensure_ascii=False)
+
+    assert stream(text, read_size) == list(PAGES.items())
+
+
+@pytest.mark.parametrize("text", ["{}", "  {\n}  "])
+def test_json_object_stream_empty_object(text):
+    assert stream(text, 1) == []
+
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '["a", 1]', '{"a": 1 "b": 2}'])
+def test_json_object_stream_rejects_invalid_json(text):
+    with pytest.raises((DatasetError, json.JSONDecodeError)):
+        stream(text, 2)
+
+
+def test_wiki_pages_dataset_formats(tmp_path):
+    json_path = tmp_path / "wiki.json"
+    json_path.write_text(json.dumps(PAGES), encoding="utf-8")
+    jsonl_path = tmp_path / "wiki.jsonl"
+    jsonl_path.write_text(
+        "\n".join(json.dumps({"title": title, "text": text}) for title, text in PAGES.items()),
+        encoding="utf-8",
+    )
+
+    assert list(WikiPagesDataset(str(json_path), read_size=5).load()) == list(PAGES.items())
+    assert list(WikiPagesDataset(str(jsonl_path)).load()) == list(PAGES.items())
+
+
+def batch(titles, dim=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "titles": titles,
+        "texts": [f"{title}: about {title}" for title in titles],
+        "embeddings": rng.standard_normal((len(titles), dim)).astype(np.float32),
+    }
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_wiki_index_append_and_load(tmp_path, mmap):
+    batches = [batch(["Johnny", "Judy"], seed=1), batch(["Jackie"], seed=2), batch(["Ünïcödé"], seed=3)]
+    writer = WikiIndexDataset(str(tmp_path / "wiki"))
+    for data in batches:
+        writer.save(data)
+
+    index = WikiIndexDataset(str(tmp_path / "wiki"), mmap=mmap).load()
+
+    titles = [title for data in batches for title in data["titles"]]
+    texts = [text for data in batches for text in data["texts"]]
+    assert len(index) == 4
+    assert index.titles == titles
+    assert [index.page_text(row) for row in range(len(index))] == texts
+    np.testing.assert_array_equal(index.embeddings, np.vstack([data["embeddings"] for data in batches]))
+
+
+def test_wiki_index_new_dataset_starts_over(tmp_path):
+    WikiIndexDataset(str(tmp_path / "wiki")).save(batch(["Johnny", "Judy"]))
+    WikiIndexDataset(str(tmp_path / "wiki")).save(batch(["Jackie"]))
+
+    assert WikiIndexDataset(str(tmp_path / "wiki")).load().titles == ["Jackie"]
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_wiki_index_empty(tmp_path, mmap):
+    WikiIndexDataset(str(tmp_path / "wiki")).save(batch([]))
+
+    index = WikiIndexDataset(str(tmp_path / "wiki"), mmap=mmap).load()
+
+    assert len(index) == 0
+    assert index.top_k(np.ones(4, dtype=np.float32), 3) == []
+
+
+def test_wiki_index_rejects_mismatched_batches(tmp_path):
+    dataset = WikiIndexDataset(str(tmp_path / "wiki"))
+    dataset.save(batch(["Johnny"], dim=4))
+
+    with pytest.raises(DatasetError):
+        dataset.save(batch(["Judy"], dim=8))
+    with pytest.raises(DatasetError):
+        dataset.save({**batch(["Judy"]), "texts": []})